@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""sbi-pdf2text.pyのベンチマーク。
+
+実際の支払通知書はリポジトリに含められないため、各PDFタイプの解析処理が受け付ける形式の
+合成データ（抽出後のテキストと、そのテキストを出力するPDF）を生成して計測する。
+
+```
+python3 benchmark.py extract --records 20
+python3 benchmark.py suite --sizes 1,10,100,1000,10000
+python3 benchmark.py startup --files 20
+```
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+import importlib.util
+
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from os.path import join, dirname, abspath
+from types import ModuleType
+from typing import Any, Callable, Dict, Final, List, Tuple, TypeVar
+
+from pdfminer.pdfinterp import PDFResourceManager
+
+
+sbi_pdf2text_path: Final[str] = join(dirname(abspath(__file__)), "sbi-pdf2text.py")
+
+
+def load_sbi_pdf2text() -> ModuleType:
+    """sbi-pdf2text.pyをモジュールとして読み込む（ファイル名にハイフンが含まれるためimport文は利用できない）。"""
+    spec = importlib.util.spec_from_file_location("sbi_pdf2text", sbi_pdf2text_path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    # プロセスプールのワーカーからpickleで参照できるよう登録する
+    sys.modules["sbi_pdf2text"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+sbi = load_sbi_pdf2text()
+
+T = TypeVar("T")
+
+zen_digits: Final = str.maketrans("0123456789.,", "０１２３４５６７８９．，")
+
+
+def zen(value: object) -> str:
+    return str(value).translate(zen_digits)
+
+
+# 合成データ
+# テキストは1行ずつの配列で、空行はPDFのテキストボックスの区切りを表す（render_pdf()を参照）。
+
+def japanese_stock_lines(no: int) -> Tuple[List[str], List[str]]:
+    """国内株式の1銘柄分の行。
+
+    Returns:
+        Tuple[銘柄名・銘柄コード（4行）, 配当情報（10行）]
+    """
+    quantity = 100 + no
+    amount = quantity * 105
+    income_tax = amount * 15315 // 100000
+    local_tax = amount * 5 // 100
+    head = [f"銘柄{no:05d}", "", f"（{zen(1000 + no % 9000)}　　）", ""]
+    body = [
+        f"２０２３年１２月　１日 　　　　１０５．０００００００ 　　　　　　　　　　　　　　{zen(quantity)}", "",
+        f"　　　　　　　　　　　　{zen(amount)} 　　　　　　　　　　　{zen(income_tax)} 　　　　　　　　　　　{zen(local_tax)}", "",
+        f"　　　　　　　　　　　　０ 　　　　　　　　　　　　{zen(amount - income_tax - local_tax)}", "",
+        "特定口座配当等受入対象", "",
+        "２０２３年　９月３０日", "",
+    ]
+    return head, body
+
+
+def japanese_report_text(records: int) -> str:
+    """「株式等利益剰余金配当金のお知らせ」（JAPANESE_STOCK_DIVIDEND_REPORT）の合成データ。1ページ2銘柄。"""
+    total_page = (records + 1) // 2
+    pages = []
+    for page in range(total_page):
+        head1, body1 = japanese_stock_lines(page * 2)
+        lines = head1 + [
+            "　　　　株式等配当金のお知らせ", "",
+            f"　　　{zen(page + 1)}／　　　{zen(total_page)}ページ",
+            "作成日：２０２４年　６月２７日", "",
+            "特定口座契約区分：源泉徴収あり", "",
+            "　ｘｘｘ　　　　　ＹＹＹＹＹＹ　　　ＺＺＺＺＺＺ", "",
+        ] + body1
+        if page * 2 + 1 < records:
+            head2, body2 = japanese_stock_lines(page * 2 + 1)
+            lines += head2 + body2
+        else:
+            lines += ["以下余白", ""]
+        lines += ["端数処理代金につきましては、お客様の口座に入金いたします。", ""]
+        # 次のページの解析開始位置（2銘柄目の25行後ろ）より前に、次のページの銘柄が来ないよう注記を追加
+        note = 1
+        while len(lines) < 52:
+            lines += [f"（注{zen(note)}）配当金に関するご注意事項", ""]
+            note += 1
+        pages.append("\n".join(lines) + "\n")
+    return "\f".join(pages) + "\f"
+
+
+def japanese_edited_text(records: int) -> str:
+    """手修正されたフォーマット（JAPANESE_STOCK_DIVIDEND_REPORT_VER_EDITED）の合成データ。"""
+    lines = ["#手修正済み"]
+    for no in range(records):
+        head, body = japanese_stock_lines(no)
+        lines += [f"#{no + 1}", head[0], head[2], body[0], body[2], body[4]]
+    return "\n".join(lines) + "\n"
+
+
+def global_ver1_record_lines(no: int) -> List[str]:
+    """外国株式（GLOBAL_STOCK_DIVIDEND_REPORT_VER1）の1銘柄分の112行。parse_data_ver1()のサンプルデータと同じ構造。"""
+    quantity = 10 + no
+    return [
+        "2019/08/08", "", "現地基準日", "2019/08/02", "", "2019/08/07", "分配通貨", "米国ドル", "",
+        "外国源泉税率（%） 1単位あたり金額", "", "          10.0            0.367189", "",
+        "銘柄コード", f"304-V{no:05d}", "決済方法", "外貨決済", "", f"合成ETF {no}", "円貨決済用レート", "",
+        "口座区分", "", "勘定設定年", "", "備考", "", "銘　柄　名", "", "数量", "", "配当金等金額", "",
+        "外国源泉", "徴収税額", "", "外国手数料", "", "外国精算金額", "", "国内源泉", "徴収税額", "",
+        "国内手数料", "", "消費税", "", "受取金額", "",
+        f"            {quantity}", "", "                 10.28", "", "                  1.02", "",
+        "                  0.00", "", "                  9.26", "外貨", "円貨", "",
+        "                   1.85             0.00", "", "                  0.00", "", "                  7.41", "",
+        "（国内源泉徴収税の明細）", "", "申告レート基準日", "", "為替レート基準日", "2019/08/07", "2019/08/08", "",
+        "申告レート", "為替レート", "    105.1700", "    106.1100", "",
+        "配当金等金額（円）", "", "外国源泉", "徴収税額（円）", "", "国内課税所得額（円）", "", "所得税", "", "地方税", "",
+        "国内源泉", "徴収税額", "", "                 1,081", "", "                   107", "", "              974", "",
+        "外貨", "                  1.40", "円貨              149", "", "                  0.45", "",
+        "                   1.85", "               48", "", "        ＊＊　 以　　上 　＊＊", "",
+        "お客様のお受取金額                  7.41米国ドル",
+    ]
+
+
+def global_ver2_record_lines(no: int) -> List[str]:
+    """外国株式（GLOBAL_STOCK_DIVIDEND_REPORT_VER2）の1銘柄分の56行。parse_data_ver2()のサンプルデータと同じ構造。"""
+    return [
+        "2023/03/29", "", "2023/03/30", "", "2023/03/24", "", f"304-W{no:05d}", "", f"ETF {no}", "", "%", "", "1", "",
+        "10.0", "", "1.042139", "", f"{100 + no}", "", "119.85", "", "11.98", "", "0.00", "", "107.87", "",
+        "21.52", "", "0.00", "", "0.00", "", "86.35", "", "2023/03/29", "2023/03/30", "", "130.2800", "132.5500", "",
+        "15,614", "", "1,560", "", "14,054", "", "16.23", "2,152", "", "5.29", "702", "", "21.52", "",
+    ]
+
+
+def global_report_text(records: int, ver1: bool) -> str:
+    """「外国株式等配当金等のご案内（兼）支払通知書」の合成データ。1ページ1銘柄。"""
+    pages = []
+    for no in range(records):
+        lines = [f"TWCODE:{no:08d}", ""]
+        if ver1:
+            lines += ["外国株式等　配当金等のご案内（兼）支払通知書", ""] + global_ver1_record_lines(no)
+        else:
+            lines += ["配当金等のご案内（兼）支払通知書", ""] + global_ver2_record_lines(no)
+        pages.append("\n".join(lines) + "\n")
+    return "\f".join(pages) + "\f"
+
+
+# PDFタイプごとの合成データの生成処理
+corpus_generators: Final[Dict[str, Callable[[int], str]]] = {
+    sbi.PdfType.JAPANESE_STOCK_DIVIDEND_REPORT.name: japanese_report_text,
+    sbi.PdfType.JAPANESE_STOCK_DIVIDEND_REPORT_VER_EDITED.name: japanese_edited_text,
+    sbi.PdfType.GLOBAL_STOCK_DIVIDEND_REPORT_VER1.name: lambda records: global_report_text(records, ver1=True),
+    sbi.PdfType.GLOBAL_STOCK_DIVIDEND_REPORT_VER2.name: lambda records: global_report_text(records, ver1=False),
+}
+
+# PDFとして生成できるPDFタイプ（手修正されたフォーマットは.pdf.txtのみ）
+pdf_types: Final[List[str]] = [
+    sbi.PdfType.JAPANESE_STOCK_DIVIDEND_REPORT.name,
+    sbi.PdfType.GLOBAL_STOCK_DIVIDEND_REPORT_VER1.name,
+    sbi.PdfType.GLOBAL_STOCK_DIVIDEND_REPORT_VER2.name,
+]
+
+
+def render_pdf(text: str, font_size: float = 6.0) -> bytes:
+    """合成データのテキストをPDFにする。
+
+    \\fでページを区切り、空行で区切られた連続する行を1つのテキストボックスとして配置する。
+    pdfminerはテキストボックスごとに末尾へ空行を出力するため、抽出結果は元のテキストと同じ行構成になる。
+    フォントはAdobe-Japan1の定義済みCMap（UniJIS-UCS2-H）を利用し、フォントの埋め込みは行わない。
+    """
+    objs: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objs.append(obj)
+        return len(objs)
+
+    descriptor = add(b"<< /Type /FontDescriptor /FontName /HeiseiKakuGo-W5 /Flags 4 /FontBBox [0 -120 1000 880] "
+                     b"/ItalicAngle 0 /Ascent 880 /Descent -120 /CapHeight 700 /StemV 80 >>")
+    cid_font = add(b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /HeiseiKakuGo-W5 "
+                   b"/CIDSystemInfo << /Registry (Adobe) /Ordering (Japan1) /Supplement 2 >> "
+                   b"/FontDescriptor %d 0 R /DW 1000 >>" % descriptor)
+    font = add(b"<< /Type /Font /Subtype /Type0 /BaseFont /HeiseiKakuGo-W5 /Encoding /UniJIS-UCS2-H "
+               b"/DescendantFonts [%d 0 R] >>" % cid_font)
+
+    pages = text.split("\f")
+    if pages[-1] == "":
+        pages.pop()
+
+    pages_id = len(objs) + len(pages) * 2 + 1
+    page_ids = []
+    for page in pages:
+        lines = page.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+
+        # 行間はフォントサイズの1.1倍（同じテキストボックス）、空行はフォントサイズの1.5倍（別のテキストボックス）
+        leading = font_size * 1.1
+        gap = font_size * 1.5
+        height = sum(leading if line else gap for line in lines) + 80
+        y = height - 40
+
+        ops = [b"BT /F1 %.1f Tf" % font_size]
+        for line in lines:
+            if line == "":
+                y -= gap
+                continue
+            ops.append(b"1 0 0 1 40 %.2f Tm <%s> Tj" % (y, line.encode("utf-16-be").hex().encode("ascii")))
+            y -= leading
+        ops.append(b"ET")
+
+        stream = b"\n".join(ops)
+        contents = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 %.0f] /Contents %d 0 R "
+                            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, height, contents, font)))
+
+    assert add(b"<< /Type /Pages /Kids [%s] /Count %d >>"
+               % (b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids))) == pages_id
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objs, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, catalog, xref)
+    return output
+
+
+def parse_text(text: str) -> List[List[str]]:
+    """テキストを解析して行を返却する（ファイルパスの列は含まない）。"""
+    source = sbi.PdfText.from_text(text)
+    _, japanese_rows, global_rows = sbi.parse_pdf_text("", source)
+    return [row[1:] for row in japanese_rows + global_rows]
+
+
+def best_of(repeat: int, func: Callable[[], T]) -> Tuple[float, T]:
+    """funcをrepeat回実行し、最短の実行時間と結果を返却する。"""
+    best = float("inf")
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_extract(args: argparse.Namespace) -> None:
+    """抽出モード（full/fast）ごとのPDFからのテキスト抽出時間を計測する。
+
+    各抽出モードで抽出したテキストを解析し、合成データのテキストを解析した結果と一致することも確認する。
+    """
+    # フォントなどのキャッシュを温めておく
+    PDFResourceManager(caching=True)
+
+    print(f"{'PDFタイプ':<40} {'ページ':>6} {'full(s)':>9} {'fast(s)':>9} {'速度比':>7}  解析結果")
+    for type_name in pdf_types:
+        text = corpus_generators[type_name](args.records)
+        pdf = render_pdf(text)
+        expected = parse_text(text)
+
+        timings = {}
+        matched = []
+        for extract_mode in sbi.extract_modes:
+            laparams = sbi.create_laparams(extract_mode)
+            elapsed, extracted = best_of(args.repeat, lambda: "".join(sbi.iter_pdf_pages(BytesIO(pdf), laparams)))
+            timings[extract_mode] = elapsed
+            matched.append(parse_text(extracted) == expected)
+
+        pages = text.count("\f")
+        result = "一致" if all(matched) else "不一致"
+        print(f"{type_name:<40} {pages:>6} {timings['full']:>9.3f} {timings['fast']:>9.3f} "
+              f"{timings['full'] / timings['fast']:>6.2f}x  {result}")
+
+
+# suiteで計測する処理段階
+suite_stages: Final[List[str]] = ["extract", "judge", "parse", "csv"]
+
+
+def judge_text(text: str) -> Any:
+    """parse_pdf_text()と同じ手順でPDFタイプを判定する（1ページ目で判定し、外国株式は全ページで再判定）。"""
+    pdf_type = sbi.judge_pdf_type(text.split("\f", 1)[0])
+    if pdf_type == sbi.PdfType.GLOBAL_STOCK_DIVIDEND_REPORT_VER1 \
+            or pdf_type == sbi.PdfType.GLOBAL_STOCK_DIVIDEND_REPORT_VER2:
+        pdf_type = sbi.judge_pdf_type(text)
+    return pdf_type
+
+
+def parse_rows(text: str, pdf_type: Any) -> List[List[str]]:
+    """判定済みのPDFタイプでテキストを解析し、CSVの行（先頭はファイルパス）を返却する。"""
+    if pdf_type == sbi.PdfType.JAPANESE_STOCK_DIVIDEND_REPORT \
+            or pdf_type == sbi.PdfType.JAPANESE_STOCK_DIVIDEND_REPORT_VER_EDITED:
+        rows = list(sbi.parse_japanese_stock_dividend_report(text, pdf_type))
+    else:
+        rows = list(sbi.parse_global_stock_dividend_report(text, pdf_type))
+    return [["benchmark.pdf"] + row for row in rows]
+
+
+def write_csv(rows: List[List[str]], header: List[str]) -> None:
+    """CsvSinkで一時ディレクトリにCSVを出力する。"""
+    with tempfile.TemporaryDirectory() as directory:
+        with sbi.CsvSink(join(directory, "benchmark.csv"), header) as sink:
+            sink.write_rows(rows)
+
+
+def run_suite_case(type_name: str, records: int, with_pdf: bool, repeat: int) -> Dict[str, Any]:
+    """1つのPDFタイプ・銘柄数について、処理段階ごとの実行時間を計測する。
+
+    最大RSSを計測ごとに取得するため、計測ごとに新しいプロセスで実行する（run_suite()を参照）。
+    """
+    text = corpus_generators[type_name](records)
+    timings: Dict[str, float | None] = dict.fromkeys(suite_stages)
+
+    if with_pdf:
+        pdf = render_pdf(text)
+        laparams = sbi.create_laparams("full")
+        timings["extract"], extracted = best_of(repeat, lambda: "".join(sbi.iter_pdf_pages(BytesIO(pdf), laparams)))
+        if parse_text(extracted) != parse_text(text):
+            raise AssertionError(f"{type_name}: 抽出したテキストの解析結果が合成データと一致しません")
+
+    timings["judge"], pdf_type = best_of(repeat, lambda: judge_text(text))
+    if pdf_type.name != type_name:
+        raise AssertionError(f"{type_name}: PDFタイプの判定結果が異なります（{pdf_type.name}）")
+
+    timings["parse"], rows = best_of(repeat, lambda: parse_rows(text, pdf_type))
+    if len(rows) != records:
+        raise AssertionError(f"{type_name}: 解析結果の行数が異なります（{len(rows)}行、期待値{records}行）")
+
+    if type_name.startswith("JAPANESE"):
+        header = sbi.japanese_stock_dividend_header
+    else:
+        header = sbi.global_stock_dividend_header
+    timings["csv"], _ = best_of(repeat, lambda: write_csv(rows, header))
+
+    # Linuxではキロバイト単位
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "pdf_type": type_name,
+        "records": records,
+        "pages": max(text.count("\f"), 1),
+        "seconds": timings,
+        "records_per_second": {stage: records / elapsed if elapsed else None for stage, elapsed in timings.items()},
+        "max_rss_kb": max_rss,
+    }
+
+
+def run_suite(args: argparse.Namespace) -> None:
+    """全PDFタイプ・指定した銘柄数ごとに、抽出・PDFタイプ判定・解析・CSV出力の処理速度（銘柄/秒）と最大RSSを計測する。
+
+    PDFからの抽出は時間がかかるため、--pdf-max-records以下の銘柄数のみ計測する。
+    """
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print(f"{'PDFタイプ':<42} {'銘柄数':>6} {'ページ':>6} "
+          + " ".join(f"{stage + '(件/s)':>13}" for stage in suite_stages) + f" {'最大RSS(MB)':>11}")
+    results = []
+    for type_name in corpus_generators:
+        for records in sizes:
+            with_pdf = type_name in pdf_types and records <= args.pdf_max_records
+            # 最大RSSは減少しないため、計測ごとに新しいプロセスで実行する
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(run_suite_case, type_name, records, with_pdf, args.repeat).result()
+            results.append(result)
+
+            rates = " ".join(f"{rate:>13,.0f}" if rate is not None else f"{'-':>13}"
+                             for rate in result["records_per_second"].values())
+            print(f"{type_name:<42} {records:>6} {result['pages']:>6} {rates} {result['max_rss_kb'] / 1024:>11.1f}")
+
+    if args.json:
+        with open(args.json, mode="w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def run_cli(directory: str, cli_args: List[str], python_args: List[str] | None = None) -> Tuple[float, str]:
+    """directoryをカレントディレクトリとしてsbi-pdf2text.pyを新しいプロセスで実行し、実行時間と標準エラー出力を返却する。"""
+    command = [sys.executable] + (python_args or []) + [sbi_pdf2text_path] + cli_args
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    return time.perf_counter() - start, completed.stderr
+
+
+def bench_startup(args: argparse.Namespace) -> None:
+    """起動から終了までの実行時間と、pdfminerをインポートしたかを、入力の状態（.pdf.txt・抽出キャッシュの有無）ごとに計測する。
+
+    Pythonの起動のみの時間も計測し、インポート・解析にかかる時間と比較できるようにする。
+    pdfminerをインポートしたかは、-X importtimeを指定して別に実行して判定する。
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        input_dir = join(directory, "input")
+        os.makedirs(input_dir)
+        os.makedirs(join(directory, "output"))
+        text = japanese_report_text(args.records)
+        pdf = render_pdf(text)
+        file_names = [f"2024-01-{no:04d}.pdf" for no in range(args.files)]
+        for file_name in file_names:
+            with open(join(input_dir, file_name), mode="wb") as f:
+                f.write(pdf)
+
+        def write_sidecars() -> None:
+            for file_name in file_names:
+                with open(join(input_dir, file_name + ".txt"), mode="w", encoding="utf-8") as f:
+                    f.write(text)
+
+        def remove_sidecars() -> None:
+            for file_name in file_names:
+                if os.path.exists(join(input_dir, file_name + ".txt")):
+                    os.remove(join(input_dir, file_name + ".txt"))
+
+        def touch_sidecar() -> None:
+            # 1ファイルの.pdf.txtを手修正した状態にする
+            os.utime(join(input_dir, file_names[0] + ".txt"), ns=(time.time_ns(), time.time_ns()))
+
+        # ケース名、実行前の準備、引数（Noneの場合はPythonの起動のみ）
+        cases: List[Tuple[str, Callable[[], None], List[str] | None]] = [
+            ("python（起動のみ）", lambda: None, None),
+            ("extract（抽出）", remove_sidecars, ["--no-cache"]),
+            ("cache（抽出キャッシュ）", lambda: None, []),
+            ("cache --only-cached", lambda: None, ["--only-cached"]),
+            ("sidecar（.pdf.txt）", write_sidecars, ["--no-cache"]),
+            ("sidecar --incremental（1ファイル修正）", touch_sidecar, ["--no-cache", "--incremental"]),
+        ]
+        # 抽出キャッシュを作成しておく
+        run_cli(directory, [])
+
+        print(f"{'ケース':<40} {'実行時間(s)':>11}  pdfminerのインポート")
+        for name, prepare, cli_args in cases:
+            prepare()
+            if cli_args is None:
+                elapsed, _ = best_of(args.repeat, lambda: subprocess.run([sys.executable, "-c", "pass"], check=True))
+                print(f"{name:<40} {elapsed:>11.3f}  -")
+                continue
+            if "--incremental" in cli_args:
+                # マニフェストを作成しておく
+                run_cli(directory, cli_args)
+
+            def run() -> None:
+                prepare()
+                run_cli(directory, cli_args)
+
+            elapsed, _ = best_of(args.repeat, run)
+            prepare()
+            _, importtime = run_cli(directory, cli_args, ["-X", "importtime"])
+            imported = "あり" if "pdfminer" in importtime else "なし"
+            print(f"{name:<40} {elapsed:>11.3f}  {imported}")
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="sbi-pdf2text.pyのベンチマーク")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = subparsers.add_parser("extract", help="抽出モード（full/fast）ごとのテキスト抽出時間を計測")
+    extract_parser.add_argument("--records", type=int, default=20, help="1ファイルあたりの銘柄数。デフォルトは20")
+    extract_parser.add_argument("--repeat", type=int, default=3, help="計測回数（最短時間を採用）。デフォルトは3")
+    extract_parser.set_defaults(func=bench_extract)
+
+    suite_parser = subparsers.add_parser("suite", help="処理段階ごとの処理速度と最大RSSを計測")
+    suite_parser.add_argument("--sizes", default="1,10,100,1000,10000",
+                              help="1ファイルあたりの銘柄数（カンマ区切り）。デフォルトは1,10,100,1000,10000")
+    suite_parser.add_argument("--pdf-max-records", type=int, default=100,
+                              help="PDFからの抽出を計測する最大の銘柄数。デフォルトは100")
+    suite_parser.add_argument("--repeat", type=int, default=3, help="計測回数（最短時間を採用）。デフォルトは3")
+    suite_parser.add_argument("--json", help="計測結果をJSON Lines形式で出力するファイル")
+    suite_parser.set_defaults(func=run_suite)
+
+    startup_parser = subparsers.add_parser("startup", help="入力の状態（.pdf.txt・抽出キャッシュの有無）ごとの起動から終了までの実行時間を計測")
+    startup_parser.add_argument("--files", type=int, default=20, help="PDFファイル数。デフォルトは20")
+    startup_parser.add_argument("--records", type=int, default=2, help="1ファイルあたりの銘柄数。デフォルトは2")
+    startup_parser.add_argument("--repeat", type=int, default=3, help="計測回数（最短時間を採用）。デフォルトは3")
+    startup_parser.set_defaults(func=bench_startup)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    args.func(args)
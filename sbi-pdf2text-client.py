@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""sbi-pdf2text.pyの解析サーバー（serveサブコマンド）のクライアント。
+
+標準ライブラリのみを利用し、pdfminerなどをインポートしないため、起動時間はPythonの起動時間のみとなる。
+解析結果はファイルごとに1行のJSON（JSON Lines形式）で標準出力に出力する。
+
+```
+python3 sbi-pdf2text.py -j 2 serve
+python3 sbi-pdf2text-client.py ./input/2024-01-01.pdf
+python3 sbi-pdf2text-client.py --send-data /tmp/download/notice.pdf
+```
+"""
+
+import os
+import sys
+import json
+import base64
+import socket
+import argparse
+
+from typing import Any, BinaryIO, Dict, Final
+
+server_socket_path: Final[str] = "./sbi-pdf2text.sock"
+
+
+def request(reader: BinaryIO, writer: BinaryIO, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """リクエストを1件送信し、レスポンスを受信する。"""
+    writer.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+    writer.flush()
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("サーバーが応答せずに切断しました")
+    return json.loads(line)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="解析サーバーにPDFの解析を依頼し、解析結果をJSON Lines形式で出力する")
+    parser.add_argument("files", type=str, nargs="+", help="解析するPDFファイルパス")
+    parser.add_argument("--socket", type=str, default=server_socket_path,
+                        help=f"解析サーバーのUnixソケットのパス。デフォルトは{server_socket_path}")
+    parser.add_argument("--send-data", default=False, action="store_true",
+                        help="ファイルパスではなくPDFの内容を送信する。サーバーからファイルを参照できない場合に指定（.pdf.txtは利用しない）")
+    return parser.parse_args()
+
+
+def main(args: argparse.Namespace) -> int:
+    """終了コード（解析エラーのファイルがあった場合は1、サーバーに接続できない場合は2、それ以外は0）を返却する。"""
+    exit_code = 0
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(args.socket)
+            with s.makefile("rb") as reader, s.makefile("wb") as writer:
+                for file_path in args.files:
+                    if args.send_data:
+                        try:
+                            with open(file_path, mode="rb") as f:
+                                data = base64.b64encode(f.read()).decode("ascii")
+                        except OSError as e:
+                            # サーバーに接続できない場合と区別し、解析エラーとして出力して次のファイルを処理する
+                            print(json.dumps({"name": file_path, "error": f"ファイルを読み込めません: {repr(e)}"}, ensure_ascii=False),
+                                  flush=True)
+                            exit_code = 1
+                            continue
+                        payload = {"name": file_path, "data": data}
+                    else:
+                        # サーバーのカレントディレクトリは異なる場合があるため、絶対パスで送信する
+                        payload = {"path": os.path.abspath(file_path)}
+                    response = request(reader, writer, payload)
+                    if "error" in response or response.get("failure") is not None:
+                        exit_code = 1
+                    print(json.dumps(response, ensure_ascii=False), flush=True)
+    except (FileNotFoundError, ConnectionError) as e:
+        print(f"解析サーバーに接続できません: {args.socket}, {repr(e)}", file=sys.stderr)
+        return 2
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_arguments()))
@@ -2,27 +2,91 @@
 # -*- coding: utf-8 -*-
 
 import sys
+import asyncio
 import os
 import re
-import codecs
+import csv
+import json
+import math
+import time
+import ctypes
+import ctypes.util
+import select
+import signal
+import socket
+import socketserver
+import threading
+import base64
+import struct
+import mmap
+import zlib
+import heapq
+import pstats
+import cProfile
+import shutil
+import sqlite3
+import hashlib
 import logging
 import argparse
+import importlib.util
+import importlib.metadata
 
 from os.path import join, exists
-from typing import Final, List, cast, Generator, Tuple
+from fnmatch import fnmatch
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack, contextmanager, nullcontext
+from itertools import repeat
+from bisect import bisect_left, bisect_right
+from io import BytesIO, StringIO
+from types import TracebackType
+from typing import TYPE_CHECKING, Final, List, Dict, Any, cast, Callable, ClassVar, ContextManager, Generator, Iterable, \
+    Iterator, Sequence, Set, Tuple, BinaryIO, TextIO, Type
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields, replace
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
 
-from pdfminer.high_level import extract_text
 from mojimoji import zen_to_han
 
+# pdfminerはインポートに時間がかかるため、PDFからテキストを抽出する時点でインポートする。
+# すべてのファイルに.pdf.txtがある場合など、抽出が不要な場合はインポートしない。
+if TYPE_CHECKING:
+    from pdfminer.layout import LAParams, LTChar, LTItem
+
 input_dir: Final[str] = "./input"
 output_dir: Final[str] = "./output"
+cache_dir: Final[str] = "./cache"
+manifest_file_name: Final[str] = "manifest.json"
+server_socket_path: Final[str] = "./sbi-pdf2text.sock"
+failure_report_name: Final[str] = "failures.jsonl"
+
+japanese_stock_dividend_csv_name: Final[str] = "japanese_stock_dividend.csv"
+japanese_stock_dividend_header: Final[List[str]] = [
+    "ファイルパス", "銘柄名", "銘柄コード", "お支払日", "配当単価（円）", "数量（株数・口数）", "配当金額（税引前）（円）",
+    "所得税（円）", "地方税（円）", "端数処理代金（円）", "お受取金額（円）"
+]
+global_stock_dividend_csv_name: Final[str] = "global_stock_dividend.csv"
+global_stock_dividend_header: Final[List[str]] = [
+    "ファイルパス", "配当金等支払日", "国内支払日", "現地基準日", "銘柄コード", "銘柄名", "分配通貨", "外国源泉税率（%）",
+    "1単位あたり金額", "決済方法", "数量", "配当金等金額", "外国源泉徴収税額", "外国手数料", "外国精算金額（外貨）",
+    "国内源泉徴収税額（外貨）", "受取金額", "申告レート基準日", "申告レート", "為替レート基準日", "為替レート",
+    "配当金等金額（円）", "外国源泉徴収税額（円）", "国内課税所得額（円）", "所得税（外貨）", "地方税（外貨）",
+    "所得税（円）", "地方税（円）", "国内源泉徴収税額（外貨）"
+]
 
 re_date_format = re.compile(r"\d{4}/\d{2}/\d{2}")
 logger = logging.getLogger(__name__)
 
 
+def normalize_numeric_text(text: str) -> str:
+    """数値・日付のテキストを正規化する。全角文字を半角に変換し、全角空白とカンマを削除する。
+
+    半角空白は削除しないため、複数の項目を含む行をまとめて正規化してから半角空白で分割できる。
+    """
+    return zen_to_han(text.replace("　", "")).replace(",", "")
+
+
 class PdfType(Enum):
     # 「株式等利益剰余金配当金のお知らせ」電子交付のお知らせ
     JAPANESE_STOCK_DIVIDEND_REPORT = 1
@@ -32,6 +96,58 @@ class PdfType(Enum):
     GLOBAL_STOCK_DIVIDEND_REPORT_VER2 = 3   # 2021年4月8日あたりからのフォーマット
 
 
+class UnsupportedPdfError(Exception):
+    """解析対象外のPDF"""
+    pass
+
+
+class NotCachedError(Exception):
+    """.pdf.txtも抽出キャッシュもないため、PDFからの抽出が必要（--only-cached用）"""
+    pass
+
+
+class FileTimeoutError(Exception):
+    """1ファイルの処理時間が制限時間（--timeout）を超えた"""
+    pass
+
+
+class ReportParseError(ValueError):
+    """支払通知書の解析エラー。
+
+    line_indexはエラーが発生した銘柄の開始行の行番号（0始まり）、line_windowはwindow_start行目（0始まり）からの前後の行。
+    行を特定できない場合はNoneと空のリスト。
+    """
+
+    def __init__(self, message: str, pdf_type: PdfType, line_index: int | None = None, window_start: int | None = None,
+                 line_window: List[str] | None = None) -> None:
+        super().__init__(message)
+        self.pdf_type = pdf_type
+        self.line_index = line_index
+        self.window_start = window_start
+        self.line_window = line_window if line_window is not None else []
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # プロセスプールのワーカーからメインプロセスへ返却できるようにする
+        return (type(self), (str(self), self.pdf_type, self.line_index, self.window_start, self.line_window))
+
+
+def parse_report_record(parse_data: Callable[[List[str]], List[str]], record: List[str], pdf_type: PdfType,
+                        lines: List[str], start_index: int, length: int) -> List[str]:
+    """1銘柄分の行（lines[start_index]からlength行）を解析する。
+
+    解析エラーの場合は、銘柄の開始位置と前後3行を含めた行を保持するReportParseErrorを送出する。
+    制限時間の超過（FileTimeoutError）は解析エラーとせずにそのまま送出する。
+    """
+    try:
+        return parse_data(record)
+    except FileTimeoutError:
+        raise
+    except Exception as e:
+        window_start = max(start_index - 3, 0)
+        raise ReportParseError(f"{start_index + 1}行目からの銘柄の解析エラー: {repr(e)}", pdf_type, start_index, window_start,
+                               lines[window_start:start_index + length + 3]) from e
+
+
 def judge_pdf_type(text: str) -> PdfType:
 
     # 「TWCODE:」で始まっている場合は「外国株式等配当金等のご案内（兼）支払通知書」電子交付のお知らせ と判断
@@ -50,7 +166,8 @@ def judge_pdf_type(text: str) -> PdfType:
     raise NotImplementedError()
 
 
-def parse_japanese_stock_dividend_report(text: str, pdf_type: PdfType) -> Generator[List[str], None, None]:
+def parse_japanese_stock_dividend_report(text: str | Iterable[str], pdf_type: PdfType,
+                                         page_count: Callable[[], int | None] | None = None) -> Generator[List[str], None, None]:
     """『「株式等利益剰余金配当金のお知らせ」電子交付のお知らせ』PDFを解析して、情報を抽出。
 
     ・銘柄名： df.loc[3][0] または df.loc[8][0]。情報がない場合は、「以下余白」が入る。
@@ -63,71 +180,16 @@ def parse_japanese_stock_dividend_report(text: str, pdf_type: PdfType) -> Genera
     ・端数処理代金（円）： df.loc[5][8] または df.loc[10][8]。全角文字列。
     ・お受取金額（円）： df.loc[5][12] または df.loc[10][12]。全角文字列。
 
+    ページ単位のテキストを渡した場合は、必要になった時点で次のページを読み込む。
+    最終ページ（「以下余白」のあるページ）を解析した時点で終了し、以降のページは読み込まない。
+    読み込んでいないページがある場合は、page_countで取得したPDFのページ数と解析したページ数を比較する。
+
     Args:
-        text: pdfminerのextract_textの返却値
+        text: pdfminerのextract_textの返却値、またはページ単位のテキスト（iter_pdf_pages()の返却値など）
         pdf_type: PDFの種類
+        page_count: PDFのページ数を返却する関数（PdfText.document_page_count()など）。ページ数が不明な場合はNoneを返却する。
     """
 
-    def count_page(lines: List[str]) -> int:
-        """ページ数をカウント。
-        
-        各ページに「株式等配当金のお知らせ」が記載されているので、それをカウントする。
-
-        Args:
-            lines: pdfminerのextract_textの返却値
-
-        Returns:
-            int: ページ数
-        """
-        page = 0
-        for line in lines:
-            if "株式等配当金のお知らせ" in line:
-                page += 1
-        return page
-
-    def search_start_index(lines: List[str], start_pos: int = 0) -> Tuple[int, int]:
-        """銘柄の開始位置を検索
-
-        - 1ページ内には最大で2銘柄が記載される。
-        - 
-
-        Args:
-            lines: pdfminerのextract_textの返却値
-            start_pos: 検索開始位置
-
-        Returns:
-            Tuple[銘柄1の開始位置, 銘柄2の開始位置]
-
-            銘柄がない場合は、開始位置は-1となる。
-        """
-        stock1_start = -1
-        stock2_start = -1
-
-        for i in range(start_pos, len(lines)):
-            line = lines[i]
-
-            if "株式等配当金のお知らせ" in line:
-                # [銘柄1] 4行前に銘柄名の記載がある
-                stock1_start = i - 4
-
-                # 銘柄と銘柄コードの間に空行がない場合の対応
-                # 空行の追加は別途行うがここでは開始位置を調整する。
-                if lines[i - 3] != "":
-                    stock1_start = i - 3
-
-                # [銘柄2] 19行後に銘柄名の記載がある
-                stock2_start = i + 19
-            
-            # 「以下余白」が含まれている場合は銘柄2の開始位置を-1にする
-            if "以下余白" in line:
-                stock2_start = -1
-
-            if "端数処理代金につきまして" in line or "（取引店）" in line:
-                break
-
-        return (stock1_start, stock2_start)
-
-
     def parse_data(lines: List[str]) -> List[str]:
         """文字文字列配列を解析して、対象銘柄の配当金情報を抽出
 
@@ -163,31 +225,32 @@ def parse_japanese_stock_dividend_report(text: str, pdf_type: PdfType) -> Genera
 
         data: List[str] = []
 
-        line5 = lines[4].split(" ")
-        line7 = lines[6].split(" ")
-        line9 = lines[8].split(" ")
+        # 全角→半角の変換、全角空白とカンマの削除は、項目ごとではなく行単位で1回だけ行う
+        line5 = normalize_numeric_text(lines[4]).split(" ")
+        line7 = normalize_numeric_text(lines[6]).split(" ")
+        line9 = normalize_numeric_text(lines[8]).split(" ")
 
         try:
             # 銘柄名
             data.append(lines[0].strip())
             # 銘柄コード
-            data.append(zen_to_han(lines[2].strip().replace("　", "").replace("（", "").replace("）", "").replace("\u3000", "")))
+            data.append(zen_to_han(lines[2].strip().replace("　", "").replace("（", "").replace("）", "")))
             # お支払日
-            data.append(zen_to_han(line5[0].replace("　", "")))
+            data.append(line5[0])
             # 配当単価（円）
-            data.append(zen_to_han(line5[1].replace("　", "")).replace(",", ""))
+            data.append(line5[1])
             # 数量（株数・口数）
-            data.append(zen_to_han(line5[2].replace("　", "")).replace(",", ""))
+            data.append(line5[2])
             # 配当金額（税引前）
-            data.append(zen_to_han(line7[0].replace("　", "")).replace(",", "")) 
+            data.append(line7[0])
             # 所得税（円）
-            data.append(zen_to_han(line7[1].replace("　", "")).replace(",", ""))
+            data.append(line7[1])
             # 地方税（円）
-            data.append(zen_to_han(line7[2].replace("　", "")).replace(",", ""))
+            data.append(line7[2])
             # 端数処理代金（円）
-            data.append(zen_to_han(line9[0].replace("　", "")).replace(",", ""))
+            data.append(line9[0])
             # お受取金額（円）
-            data.append(zen_to_han(line9[1].replace("　", "")).replace(",", ""))
+            data.append(line9[1])
         except Exception as e:
             logger.error(f"データ解析エラー: {repr(lines)}")
             for index, line in enumerate(lines):
@@ -196,35 +259,127 @@ def parse_japanese_stock_dividend_report(text: str, pdf_type: PdfType) -> Genera
 
         return data
 
-    def adjust_lines(lines: List[str], start_index: int) -> int:
-        add_line_num = 0
+    pages: Iterator[str] = iter([text] if isinstance(text, str) else text)
 
-        # 1行目と2行目の間に空行がない場合、空行を追加する
-        # データ的には空行が入らない方が少ない。
-        if lines[start_index + 1] != "":
-            lines.insert(start_index + 1, "")
-            add_line_num += 1
+    if pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT:
+        lines: List[str] = []
+        # 改行で終わっていないページ末尾の行。次のページの先頭行と結合する。
+        carry_line = ""
+        # すべてのページを読み込んだか
+        all_pages_read = False
 
-        return add_line_num
+        # 目印となる行の行番号（昇順）。ページの読み込み時に1回だけ走査して作成する。
+        # 各ページに「株式等配当金のお知らせ」が記載されているので、その数をページ数とする。
+        notice_indexes: List[int] = []      # 「株式等配当金のお知らせ」
+        blank_indexes: List[int] = []       # 「以下余白」
+        end_indexes: List[int] = []         # 「端数処理代金につきまして」または「（取引店）」（ページ内の銘柄の終了位置）
 
-    if pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT:
-        # U+000C(\f) Form feedを半角スペースに置換
-        # text.splitlines()で\fも改行として扱われ、実際のテキストファイルの行数とずれるため除去
-        text = text.replace("\f", " ")
-        lines = text.splitlines()
+        def read_page() -> bool:
+            """次のページを読み込み、linesに追加する。
+
+            目印となる行の行番号も読み込み時に記録する。
+
+            Returns:
+                bool: 読み込んだ場合はTrue。すべてのページを読み込み済みの場合はFalse。
+            """
+            nonlocal carry_line, all_pages_read
+
+            page = next(pages, None)
+            if page is None:
+                all_pages_read = True
+                if carry_line == "":
+                    return False
+                page_lines = [carry_line]
+                carry_line = ""
+            else:
+                # U+000C(\f) Form feedを半角スペースに置換
+                # text.splitlines()で\fも改行として扱われ、実際のテキストファイルの行数とずれるため除去
+                buffer = carry_line + page.replace("\f", " ")
+                page_lines = buffer.splitlines()
+                carry_line = "" if buffer.endswith(("\n", "\r")) or not page_lines else page_lines.pop()
+
+            for index, line in enumerate(page_lines, start=len(lines)):
+                if "株式等配当金のお知らせ" in line:
+                    notice_indexes.append(index)
+                if "以下余白" in line:
+                    blank_indexes.append(index)
+                if "端数処理代金につきまして" in line or "（取引店）" in line:
+                    end_indexes.append(index)
+            lines.extend(page_lines)
+            return True
+
+        def has_line(index: int) -> bool:
+            """lines[index]が存在するか判定する。存在しない場合は存在するまでページを読み込む。"""
+            while len(lines) <= index:
+                if not read_page():
+                    return False
+            return True
+
+        def search_start_index(start_pos: int) -> Tuple[int, int]:
+            """銘柄の開始位置を検索
+
+            - 1ページ内には最大で2銘柄が記載される。
+            - start_pos以降の最初の終了位置（「端数処理代金につきまして」または「（取引店）」）までを検索範囲とし、
+              終了位置が見つかるまで次のページを読み込む。
+
+            Args:
+                start_pos: 検索開始位置
+
+            Returns:
+                Tuple[銘柄1の開始位置, 銘柄2の開始位置]
+
+                銘柄がない場合は、開始位置は-1となる。
+            """
+            while True:
+                end_pos = bisect_left(end_indexes, start_pos)
+                if end_pos < len(end_indexes):
+                    stop_pos = end_indexes[end_pos]
+                    break
+                if not read_page():
+                    stop_pos = len(lines) - 1
+                    break
+
+            # 検索範囲内に「株式等配当金のお知らせ」が複数ある場合は最後のものを採用
+            notice_pos = bisect_right(notice_indexes, stop_pos)
+            if notice_pos == 0 or notice_indexes[notice_pos - 1] < start_pos:
+                return (-1, -1)
+            i = notice_indexes[notice_pos - 1]
+
+            # [銘柄1] 4行前に銘柄名の記載がある
+            # 銘柄と銘柄コードの間に空行がない場合は3行前（空行はrecord_lines()で補う）
+            stock1_start = i - 4 if lines[i - 3] == "" else i - 3
+
+            # [銘柄2] 19行後に銘柄名の記載がある
+            # 「以下余白」が含まれている場合は銘柄2の開始位置を-1にする
+            stock2_start = i + 19
+            if bisect_right(blank_indexes, stop_pos) > bisect_left(blank_indexes, i):
+                stock2_start = -1
+
+            return (stock1_start, stock2_start)
+
+        def lacks_blank_line(start_index: int) -> bool:
+            """銘柄名の次の行が空行ではないか判定する。データ的には空行が入らない方が少ない。"""
+            return lines[start_index + 1] != ""
+
+        def record_lines(start_index: int, length: int) -> List[str]:
+            """銘柄の開始位置からlength行を返却する。1行目と2行目の間に空行がない場合は空行を補う。"""
+            if lacks_blank_line(start_index):
+                return [lines[start_index], ""] + lines[start_index + 1:start_index + length - 1]
+            return lines[start_index:start_index + length]
 
-        total_page = count_page(lines)
         process_page = 0
 
         next_start_index = 0
         while True:
-            (stock1_start, stock2_start) = search_start_index(lines, next_start_index)
+            (stock1_start, stock2_start) = search_start_index(next_start_index)
 
             if stock1_start != -1:
-                stock2_start += adjust_lines(lines, stock1_start)
+                has_line(stock1_start + 23)
+                stock1_lines = record_lines(stock1_start, 23)
                 logger.debug(f"銘柄1の開始行番号: {stock1_start+1}, 先頭行: {lines[stock1_start]}")
                 # 5行目から13行目までの情報を除外。4行+10行=14行のデータをparse_dataに渡す（銘柄2と同じ構造）
-                yield parse_data(lines[stock1_start:stock1_start+4] + lines[stock1_start+13:stock1_start+23])
+                yield parse_report_record(parse_data, stock1_lines[0:4] + stock1_lines[13:23], pdf_type, lines,
+                                          stock1_start, 23)
 
                 process_page += 1
             else:
@@ -232,24 +387,30 @@ def parse_japanese_stock_dividend_report(text: str, pdf_type: PdfType) -> Genera
                 break
 
             if stock2_start != -1:
-                adjust_lines(lines, stock2_start)
+                has_line(stock2_start + 14)
                 logger.debug(f"銘柄2の開始行番号: {stock2_start+1}, 先頭行: {lines[stock2_start]}")
-                yield parse_data(lines[stock2_start:stock2_start+14])
-                # 次のページの開始位置を設定
-                next_start_index = stock2_start + 25
+                yield parse_report_record(parse_data, record_lines(stock2_start, 14), pdf_type, lines, stock2_start, 14)
+                # 次のページの開始位置を設定（補った空行を含めて25行後）
+                next_start_index = stock2_start + 25 - (1 if lacks_blank_line(stock2_start) else 0)
             else:
                 # 銘柄2がない場合は最終ページのため終了
                 break
-        
+
+        total_page = len(notice_indexes)
+        if not all_pages_read and page_count is not None:
+            # 読み込んでいないページの「株式等配当金のお知らせ」は数えられないため、PDFのページ数と比較する
+            document_page_count = page_count()
+            if document_page_count is not None:
+                total_page = max(total_page, document_page_count)
         if total_page != process_page:
             logger.warning(f"ページ数が一致しません。 実際のページ数:{total_page}, 解析したページ数:{process_page}")
-            raise ValueError("ページ数が一致しません。")
+            raise ReportParseError("ページ数が一致しません。", pdf_type)
     elif pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT_VER_EDITED:
         # 手修正されたフォーマットの場合の処理を実装
         data_start = False
         data_counter = 0
         i = 0
-        lines = text.splitlines()
+        lines = "".join(pages).splitlines()
         
         while i < len(lines):
             if "手修正済" in lines[i]:
@@ -276,7 +437,7 @@ def parse_japanese_stock_dividend_report(text: str, pdf_type: PdfType) -> Genera
                     "",          # 12:日付（空行）
                     ""           # 13:空行
                 ]
-                yield parse_data(data)
+                yield parse_report_record(parse_data, data, pdf_type, lines, i, 5)
 
                 # 1銘柄5行で構成
                 i += 5
@@ -286,7 +447,8 @@ def parse_japanese_stock_dividend_report(text: str, pdf_type: PdfType) -> Genera
         
         if data_counter == 0:
             logger.warning("手修正フォーマットの解析でデータが見つかりませんでした。データNoが設定されていない可能性があります。")
-            raise ValueError("手修正フォーマットの解析でデータが見つかりませんでした。データNoが設定されていない可能性があります。")
+            raise ReportParseError("手修正フォーマットの解析でデータが見つかりませんでした。データNoが設定されていない可能性があります。",
+                                   pdf_type)
     else:
         raise NotImplementedError("対応していないPDFタイプです。")
 
@@ -308,21 +470,47 @@ def parse_global_stock_dividend_report(text: str, pdf_type: PdfType) -> Generato
 
         return -1
 
-    def adjust_lines(lines: List[str], start_index: int) -> int:
-        add_line_num = 0
-        index = start_index
+    # 除外した行（「gT」の行と直後の空行）の行番号
+    removed_indexes: Set[int] = set()
+    last_removed_index = -1
+
+    def next_index(index: int) -> int:
+        """index以降で除外していない最初の行番号"""
+        while index in removed_indexes:
+            index += 1
+        return index
+
+    def record_indexes(lines: List[str], start_index: int, data_length: int) -> Sequence[int]:
+        """開始位置から1銘柄分（data_length行）の行番号を返却する。
+
+        「gT」の行と直後の空行は除外し、以降の銘柄の検索でも除外したままとする。
+        除外した行の位置に詰められる行は「gT」の判定を行わない（行を削除していた従来の処理と同じ結果にするため）。
+        """
+        nonlocal last_removed_index
 
-        # 必要に応じて処理を実装
-        for i in range(start_index, start_index + 56):
-            line = lines[i]
+        end_index = min(start_index + data_length, len(lines))
+        if start_index > last_removed_index:
+            try:
+                lines.index("gT", start_index, end_index)
+            except ValueError:
+                # 除外する行がない場合は連続した行番号
+                return range(start_index, end_index)
 
-            if "gT" == line:
-                if lines[i+1] == "":
-                    del lines[i+1]
-                del lines[i]
+        indexes: List[int] = []
+        i = next_index(start_index)
+        while len(indexes) < data_length and i < len(lines):
+            if lines[i] == "gT":
+                removed_indexes.add(i)
+                last_removed_index = i
+                i = next_index(i + 1)
+                if lines[i] == "":
+                    removed_indexes.add(i)
+                    last_removed_index = i
+                    i = next_index(i + 1)
+            indexes.append(i)
+            i = next_index(i + 1)
+        return indexes
 
-        return add_line_num
-    
     def parse_data_ver1(lines: List[str]) -> List[str]:
         """
 
@@ -447,9 +635,6 @@ def parse_global_stock_dividend_report(text: str, pdf_type: PdfType) -> Generato
 
         data: List[str] = []
 
-        for i, line in enumerate(lines):
-            lines[i] = line.strip()
-
         # 空行をチェック
         for i in [1, 4, 8, 10, 12, 17, 20, 22, 24, 26, 28, 60, 74, 93, 95, 99, 103, 105]:
             if lines[i] != "":
@@ -596,9 +781,6 @@ def parse_global_stock_dividend_report(text: str, pdf_type: PdfType) -> Generato
 
         data: List[str] = []
 
-        for i, line in enumerate(lines):
-            lines[i] = line.strip()
-
         # 空行をチェック
         for i in list(range(1, 36, 2)) + [38, 41, 43, 45, 47, 50, 53]:
             if lines[i] != "":
@@ -676,137 +858,3362 @@ def parse_global_stock_dividend_report(text: str, pdf_type: PdfType) -> Generato
             break
 
         if pdf_type == PdfType.GLOBAL_STOCK_DIVIDEND_REPORT_VER1:
-            yield parse_data_ver1(lines[start_index:start_index+data_length])
+            indexes: Sequence[int] = range(start_index, min(start_index + data_length, len(lines)))
+            yield parse_report_record(parse_data_ver1, [lines[i].strip() for i in indexes], pdf_type, lines, start_index,
+                                      data_length)
         elif pdf_type == PdfType.GLOBAL_STOCK_DIVIDEND_REPORT_VER2:
-            # 対象リストデータを必要に応じて整形
-            adjust_lines(lines, start_index)
+            # 不要な行を除外した1銘柄分の行番号
+            indexes = record_indexes(lines, start_index, data_length)
             # データを抽出
-            yield parse_data_ver2(lines[start_index:start_index+data_length])
+            yield parse_report_record(parse_data_ver2, [lines[i].strip() for i in indexes], pdf_type, lines, start_index,
+                                      data_length)
         else:
             raise NotImplementedError()
         
         # 次の銘柄の開始位置は基本的にはdata_length行後ろだが、少し前から探索する
-        next_start_index = start_index + data_length - 5
+        next_start_index = indexes[data_length - 5]
 
 
-def list2csv(csv_path: str, data_list: List[str], encoding: str = "cp932") -> None:
-    with codecs.open(csv_path, mode="w", encoding=encoding) as f:
-        for line in data_list:
-            f.write(line)
-            f.write("\n")
+def parse_int(value: str) -> int | None:
+    """整数の項目を変換する。空文字列の場合はNone。"""
+    return int(value) if value != "" else None
 
 
-def read_rdf(file_path: str) -> str:
-    txt_file_path = file_path + ".txt"
-    if exists(txt_file_path):
-        logger.debug(f"テキストファイル読み込み： {txt_file_path}")
-        with open(txt_file_path, mode="r", encoding="utf-8") as f:
-            return f.read()
-    else:
-        logger.debug(f"PDFファイル読み込み： {file_path}")
-        return extract_text(file_path)
+def parse_decimal(value: str) -> Decimal | None:
+    """小数を含む項目を変換する。空文字列の場合はNone。"""
+    if value == "":
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"数値に変換できません: {value}")
 
-@dataclass
-class Arguments:
-    input: str | None
-    force_save_text: bool
 
+def parse_slash_date(value: str) -> date | None:
+    """YYYY/MM/DD形式の日付を変換する。空文字列の場合はNone。"""
+    return datetime.strptime(value, "%Y/%m/%d").date() if value != "" else None
 
-def parse_arguments() -> Arguments:
-    parser = argparse.ArgumentParser(description="PDF解析ツール")
-    parser.add_argument("-i", "--input", type=str, default=None, help="解析対象のPDFファイルパス。未指定の場合は、対象ディレクトリを再帰的に解析")
-    parser.add_argument("-f", "--force-save-text", default=False, action="store_true", help="解析結果を強制的にテキストファイルに保存")
-    args = parser.parse_args()
 
-    named_args = {
-        "input": args.input,
-        "force_save_text": args.force_save_text
+def format_slash_date(value: date) -> str:
+    return value.strftime("%Y/%m/%d")
+
+
+def parse_japanese_date(value: str) -> date | None:
+    """Y年M月D日形式の日付を変換する。空文字列の場合はNone。"""
+    return datetime.strptime(value, "%Y年%m月%d日").date() if value != "" else None
+
+
+def format_japanese_date(value: date) -> str:
+    # 解析結果の日付は月日を0埋めしない
+    return f"{value.year}年{value.month}月{value.day}日"
+
+
+class StockDividendRecord:
+    """配当金の1行。各項目は解析時に1回だけ型変換して保持する。
+
+    サブクラスはdataclass(slots=True)で、フィールドの順序はCSVのヘッダと同じにする。支払日のフィールド名はpayment_dateとする。
+    convertersに各フィールドの変換処理（CSVの文字列→値）、format_dateに日付の書式化処理を指定する。
+    """
+    __slots__ = ()
+
+    converters: ClassVar[Tuple[Callable[[str], Any], ...]]
+    format_date: ClassVar[Callable[[date], str]]
+    header: ClassVar[List[str]]
+
+    @classmethod
+    def from_row(cls, row: List[str]) -> Any:
+        """CSVの1行（解析処理の返却値）から作成する。変換できない項目がある場合はValueErrorを送出する。"""
+        if len(row) != len(cls.converters):
+            raise ValueError(f"項目数が一致しません: {len(row)}（期待値{len(cls.converters)}） row={repr(row)}")
+        try:
+            return cls(*[convert(value) for convert, value in zip(cls.converters, row)])
+        except ValueError as e:
+            raise ValueError(f"型変換エラー: {e}, row={repr(row)}") from e
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[List[str]]) -> List[Any]:
+        """CSVの行（解析処理の返却値）から作成する。変換できない項目がある場合はValueErrorを送出する。"""
+        return [cls.from_row(row) for row in rows]
+
+    def to_row(self) -> List[str]:
+        """CSVの1行に変換する。"""
+        row: List[str] = []
+        for f in fields(cast(Any, self)):
+            value = getattr(self, f.name)
+            if value is None:
+                row.append("")
+            elif isinstance(value, date):
+                row.append(type(self).format_date(value))
+            else:
+                row.append(str(value))
+        return row
+
+
+@dataclass(slots=True)
+class JapaneseStockDividendRecord(StockDividendRecord):
+    """国内株式の配当金の1行。金額・数量はint、配当単価はDecimal、お支払日はdate。"""
+    file_path: str
+    name: str
+    code: str
+    payment_date: date | None
+    unit_dividend: Decimal | None
+    quantity: int | None
+    dividend_amount: int | None
+    income_tax: int | None
+    local_tax: int | None
+    fractional_amount: int | None
+    received_amount: int | None
+
+    converters = (str, str, str, parse_japanese_date, parse_decimal, parse_int, parse_int, parse_int, parse_int, parse_int,
+                  parse_int)
+    format_date = format_japanese_date
+    header = japanese_stock_dividend_header
+
+
+@dataclass(slots=True)
+class GlobalStockDividendRecord(StockDividendRecord):
+    """外国株式の配当金の1行。外貨の金額・数量・税率・レートはDecimal、円貨の金額はint、日付はdate。"""
+    file_path: str
+    payment_date: date | None
+    domestic_payment_date: date | None
+    record_date: date | None
+    code: str
+    name: str
+    currency: str
+    foreign_tax_rate: Decimal | None
+    unit_dividend: Decimal | None
+    settlement: str
+    quantity: Decimal | None
+    dividend_amount: Decimal | None
+    foreign_tax: Decimal | None
+    foreign_fee: Decimal | None
+    foreign_net_amount: Decimal | None
+    domestic_tax: Decimal | None
+    received_amount: Decimal | None
+    declared_rate_date: date | None
+    declared_rate: Decimal | None
+    exchange_rate_date: date | None
+    exchange_rate: Decimal | None
+    dividend_amount_jpy: int | None
+    foreign_tax_jpy: int | None
+    taxable_income_jpy: int | None
+    income_tax: Decimal | None
+    local_tax: Decimal | None
+    income_tax_jpy: int | None
+    local_tax_jpy: int | None
+    domestic_tax_total: Decimal | None
+
+    converters = (str, parse_slash_date, parse_slash_date, parse_slash_date, str, str, str, parse_decimal, parse_decimal, str,
+                  parse_decimal, parse_decimal, parse_decimal, parse_decimal, parse_decimal, parse_decimal, parse_decimal,
+                  parse_slash_date, parse_decimal, parse_slash_date, parse_decimal, parse_int, parse_int, parse_int,
+                  parse_decimal, parse_decimal, parse_int, parse_int, parse_decimal)
+    format_date = format_slash_date
+    header = global_stock_dividend_header
+
+
+class StockDividendBatch:
+    """配当金の行を列ごとに保持する（列指向）。
+
+    列はフィールド名をキーとした値のリストで、NumPyの配列やpandasのDataFrameへ行ごとの変換なしに渡せる。
+    NumPy・pandasは開発用の依存パッケージのため、to_numpy()・to_pandas()の呼び出し時にインポートする。
+    """
+
+    def __init__(self, record_type: Type[StockDividendRecord], columns: Dict[str, List[Any]]) -> None:
+        self.record_type = record_type
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, record_type: Type[StockDividendRecord], records: Iterable[StockDividendRecord]) -> "StockDividendBatch":
+        names = [f.name for f in fields(cast(Any, record_type))]
+        columns: Dict[str, List[Any]] = {name: [] for name in names}
+        appends = [columns[name].append for name in names]
+        for record in records:
+            for append, name in zip(appends, names):
+                append(getattr(record, name))
+        return cls(record_type, columns)
+
+    @classmethod
+    def from_rows(cls, record_type: Type[StockDividendRecord], rows: Iterable[List[str]]) -> "StockDividendBatch":
+        """CSVの行（解析処理の返却値）から作成する。各項目は列ごとに1回だけ型変換する。"""
+        return cls.from_records(record_type, (record_type.from_row(row) for row in rows))
+
+    @classmethod
+    def read_csv(cls, record_type: Type[StockDividendRecord], csv_path: str, encoding: str = "cp932") -> "StockDividendBatch":
+        """本ツールが出力したCSVファイルを読み込む。"""
+        with open(csv_path, mode="r", encoding=encoding, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header != record_type.header:
+                raise ValueError(f"CSVファイルのヘッダが一致しません: {csv_path}")
+            return cls.from_rows(record_type, reader)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+    def records(self) -> Generator[StockDividendRecord, None, None]:
+        for values in zip(*self.columns.values()):
+            yield self.record_type(*values)
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """列ごとのNumPy配列。
+
+        整数の列はint64（欠損値がある場合はfloat64でNaN）、日付の列はdatetime64[D]（欠損値はNaT）、
+        Decimalと文字列の列は精度を保つためobject型とする。
+        """
+        import numpy
+
+        arrays: Dict[str, Any] = {}
+        for f in fields(cast(Any, self.record_type)):
+            values = self.columns[f.name]
+            if f.type == int | None:
+                if None in values:
+                    arrays[f.name] = numpy.array([numpy.nan if v is None else v for v in values], dtype="float64")
+                else:
+                    arrays[f.name] = numpy.array(values, dtype="int64")
+            elif f.type == date | None:
+                arrays[f.name] = numpy.array(values, dtype="datetime64[D]")
+            else:
+                arrays[f.name] = numpy.array(values, dtype=object)
+        return arrays
+
+    def to_pandas(self) -> Any:
+        """pandasのDataFrame。列名はフィールド名（外国株式のCSVのヘッダには重複があるため）。"""
+        import pandas  # type: ignore[import-untyped]
+
+        return pandas.DataFrame(self.to_numpy())
+
+    def to_arrow(self) -> Any:
+        """pyarrowのTable。列名はフィールド名。
+
+        整数の列はint64、日付の列はdate32、Decimalの列はdecimal128(38, 10)、文字列の列はstringとする。
+        """
+        import pyarrow  # type: ignore[import-untyped, import-not-found]
+
+        arrays = []
+        for f in fields(cast(Any, self.record_type)):
+            if f.type == int | None:
+                arrow_type = pyarrow.int64()
+            elif f.type == date | None:
+                arrow_type = pyarrow.date32()
+            elif f.type == Decimal | None:
+                arrow_type = pyarrow.decimal128(38, 10)
+            else:
+                arrow_type = pyarrow.string()
+            arrays.append(pyarrow.array(self.columns[f.name], type=arrow_type))
+        return pyarrow.Table.from_arrays(arrays, names=list(self.columns))
+
+
+class CsvSink:
+    """CSVファイルへ行を逐次出力する。
+
+    行は一時ファイル（<CSVファイル>.tmp）にバッファリングして書き込み、1ファイル分の行を書き込むごとにフラッシュする。
+    正常終了時は一時ファイルを本来のファイル名にリネームするため、CSVファイルが書きかけの状態になることはない。
+    解析エラーなどで中断した場合は、それまでに出力した行を<CSVファイル>.partialとして残す。
+    appendがTrueの場合は、既存のCSVファイルへ直接追記する（--watch用）。
+
+    withブロックで利用する。
+    """
+
+    def __init__(self, csv_path: str, header: List[str], encoding: str = "cp932", buffer_size: int = 1024 * 1024,
+                 append: bool = False) -> None:
+        self.csv_path = csv_path
+        self.append = append
+        # 追記する場合は一時ファイルを利用しない
+        self.tmp_path = csv_path if append else csv_path + ".tmp"
+        self.row_count = 0
+        write_header = not (append and exists(csv_path))
+        self.file: TextIO = open(self.tmp_path, mode="a" if append else "w", encoding=encoding, newline="",
+                                 buffering=buffer_size)
+        self.writer = csv.writer(self.file, lineterminator="\n")
+        if write_header:
+            self.writer.writerow(header)
+
+    def write_rows(self, rows: List[List[str]]) -> None:
+        if not rows:
+            return
+        self.writer.writerows(rows)
+        self.file.flush()
+        self.row_count += len(rows)
+
+    def commit(self) -> None:
+        self.file.close()
+        if self.append:
+            logger.info(f"{os.path.basename(self.csv_path)} 追記終了: {self.row_count}行")
+            return
+        os.replace(self.tmp_path, self.csv_path)
+        logger.info(f"{os.path.basename(self.csv_path)} 作成終了: {self.row_count}行")
+
+    def abort(self) -> None:
+        self.file.close()
+        if self.append:
+            logger.warning(f"処理が中断されたため、出力済みの{self.row_count}行のみ追記しました: {self.csv_path}")
+            return
+        partial_path = self.csv_path + ".partial"
+        os.replace(self.tmp_path, partial_path)
+        logger.warning(f"処理が中断されたため、出力済みの{self.row_count}行を保存しました: {partial_path}")
+
+    def __enter__(self) -> "CsvSink":
+        return self
+
+    def __exit__(self, exc_type: Type[BaseException] | None, exc_value: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+# 列指向の出力形式
+columnar_formats: Final[Dict[str, str]] = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+class ColumnarSink:
+    """列指向のファイル（ParquetまたはArrow IPC）へ行を逐次出力する。
+
+    支払日の年でパーティション分割し、<出力ディレクトリ>/<テーブル名>/year=<年>/part-0.<拡張子>に出力する（Hiveパーティション形式）。
+    支払日がない行はyear=unknownに出力する。
+    行は解析時に型変換したレコード（FileResult.japanese_stock_dividend_recordsなど）を受け取り、
+    batch_size行ごとにレコードバッチとして書き込む。
+    CsvSinkと同様に一時ディレクトリ（<テーブル名>.tmp）へ出力し、正常終了時に本来のディレクトリ名にリネームする。
+    解析エラーなどで中断した場合は、それまでに出力した行を<テーブル名>.partialとして残す。
+    appendがTrueの場合は、既存のディレクトリへpart-<時刻>.<拡張子>として直接追加する（--watch用）。
+
+    pyarrowが必要。withブロックで利用する。
+    """
+
+    def __init__(self, directory: str, table_name: str, record_type: Type[StockDividendRecord],
+                 file_format: str = "parquet", batch_size: int = 10000, append: bool = False) -> None:
+        self.path = join(directory, table_name)
+        self.append = append
+        # 追記する場合は一時ディレクトリを利用しない
+        self.tmp_path = self.path if append else self.path + ".tmp"
+        self.part_name = f"part-{time.time_ns()}" if append else "part-0"
+        self.record_type = record_type
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.records: List[StockDividendRecord] = []
+        self.writers: Dict[str, Any] = {}
+        self.row_count = 0
+
+        if not append and exists(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path, exist_ok=True)
+
+    def write_records(self, records: Sequence[StockDividendRecord]) -> None:
+        if not records:
+            return
+        self.records.extend(records)
+        self.row_count += len(records)
+        if len(self.records) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """バッファの行を年ごとにレコードバッチとして書き込む。"""
+        partitions: Dict[str, List[StockDividendRecord]] = {}
+        for record in self.records:
+            payment_date = getattr(record, "payment_date")
+            year = str(payment_date.year) if payment_date is not None else "unknown"
+            partitions.setdefault(year, []).append(record)
+        self.records = []
+
+        for year, records in partitions.items():
+            table = StockDividendBatch.from_records(self.record_type, records).to_arrow()
+            writer = self.writers.get(year)
+            if writer is None:
+                writer = self.open_writer(year, table.schema)
+                self.writers[year] = writer
+            writer.write_table(table)
+
+    def open_writer(self, year: str, schema: Any) -> Any:
+        partition_dir = join(self.tmp_path, f"year={year}")
+        os.makedirs(partition_dir, exist_ok=True)
+        file_path = join(partition_dir, self.part_name + columnar_formats[self.file_format])
+        if self.file_format == "parquet":
+            import pyarrow.parquet  # type: ignore[import-untyped, import-not-found]
+            return pyarrow.parquet.ParquetWriter(file_path, schema)
+        import pyarrow.ipc  # type: ignore[import-untyped, import-not-found]
+        return pyarrow.ipc.new_file(file_path, schema)
+
+    def close(self) -> None:
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def commit(self) -> None:
+        self.flush()
+        self.close()
+        if self.append:
+            logger.info(f"{os.path.basename(self.path)}（{self.file_format}） 追記終了: {self.row_count}行")
+            return
+        if exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self.tmp_path, self.path)
+        logger.info(f"{os.path.basename(self.path)}（{self.file_format}） 作成終了: {self.row_count}行, パーティション数={len(os.listdir(self.path))}")
+
+    def abort(self) -> None:
+        self.close()
+        if self.append:
+            logger.warning(f"処理が中断されたため、出力済みの行のみ追記しました: {self.path}")
+            return
+        partial_path = self.path + ".partial"
+        if exists(partial_path):
+            shutil.rmtree(partial_path)
+        os.replace(self.tmp_path, partial_path)
+        logger.warning(f"処理が中断されたため、出力済みの行を保存しました: {partial_path}")
+
+    def __enter__(self) -> "ColumnarSink":
+        return self
+
+    def __exit__(self, exc_type: Type[BaseException] | None, exc_value: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+def sqlite_type(value_type: Any) -> str:
+    """レコードのフィールドの型に対応するSQLiteの型。Decimalは精度を保つためTEXTで保存する。"""
+    return "INTEGER" if value_type in (int, int | None) else "TEXT"
+
+
+def sqlite_value(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class SqliteSink:
+    """SQLiteデータベースへ解析結果を出力する。
+
+    国内株式・外国株式ごとのテーブルに、レコードのフィールドに加えてPDFファイルの内容のSHA-256（source_sha256）を保存する。
+    主キーは(source_sha256, code, payment_date, seq)。seqは1ファイル内で銘柄コードと支払日が同じ行（口座区分違いなど）の通番。
+    日付はISO 8601形式（YYYY-MM-DD）の文字列で保存し、支払日がない場合は空文字とする。
+    銘柄コードと支払日にインデックスを作成する。
+
+    1ファイル分の行をUPSERTし、同じファイル（内容）の前回の実行時の行のうち今回出力しなかった行を削除するため、
+    再解析しても行は重複しない。同じパスのファイルの内容が変わった場合は、変更前の内容の行を削除する。
+    batch_size行ごとにコミットし、正常終了時は存在しなくなったファイルの行を削除してコミットする。
+    解析エラーなどで中断した場合も、それまでに出力したファイルの行はコミットする（1ファイル分の行は同じトランザクションで更新する）。
+
+    withブロックで利用する。
+    """
+    tables: ClassVar[Dict[str, Type[StockDividendRecord]]] = {
+        "japanese_stock_dividend": JapaneseStockDividendRecord,
+        "global_stock_dividend": GlobalStockDividendRecord,
     }
+    key_columns: ClassVar[Tuple[str, ...]] = ("source_sha256", "code", "payment_date", "seq")
 
-    return Arguments(**named_args)
+    def __init__(self, path: str, batch_size: int = 10000) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        # 今回の実行で更新した行の識別子
+        self.run_id = time.time_ns()
+        self.pending_rows = 0
+        self.row_count = 0
+        # パイプラインでは出力のスレッドが呼び出しごとに異なるため、同じスレッドでの利用に限定しない（出力は逐次行われる）
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.upsert_sqls: Dict[str, str] = {}
+        for table, record_type in self.tables.items():
+            self.create_table(table, record_type)
+        self.connection.commit()
 
+    def create_table(self, table: str, record_type: Type[StockDividendRecord]) -> None:
+        record_fields = fields(cast(Any, record_type))
+        columns = ["source_sha256 TEXT NOT NULL", "seq INTEGER NOT NULL", "run_id INTEGER NOT NULL"]
+        for f in record_fields:
+            not_null = " NOT NULL" if f.name in self.key_columns or f.type is str else ""
+            columns.append(f"{f.name} {sqlite_type(f.type)}{not_null}")
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)}, PRIMARY KEY ({', '.join(self.key_columns)}))")
+        self.connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_code ON {table} (code, payment_date)")
+        self.connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_payment_date ON {table} (payment_date)")
+        self.connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_file_path ON {table} (file_path)")
 
-def main(args: Arguments) -> None:
-    japanese_stock_dividend_list: List[str] = list()
-    global_stock_dividend_list: List[str] = list()
+        names = ["source_sha256", "seq", "run_id"] + [f.name for f in record_fields]
+        updates = ", ".join(f"{name} = excluded.{name}" for name in names if name not in self.key_columns)
+        self.upsert_sqls[table] = (
+            f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT ({', '.join(self.key_columns)}) DO UPDATE SET {updates}")
 
-    japanese_stock_dividend_list.append("ファイルパス,銘柄名,銘柄コード,お支払日,配当単価（円）,数量（株数・口数）,配当金額（税引前）（円）,所得税（円）,地方税（円）,端数処理代金（円）,お受取金額（円）")
-    global_stock_dividend_list.append(
-        "ファイルパス,配当金等支払日,国内支払日,現地基準日,銘柄コード,銘柄名,分配通貨,外国源泉税率（%）,1単位あたり金額,決済方法,数量,配当金等金額,外国源泉徴収税額,外国手数料,外国精算金額（外貨）,国内源泉徴収税額（外貨）,受取金額,申告レート基準日,申告レート,為替レート基準日,為替レート,配当金等金額（円）,外国源泉徴収税額（円）,国内課税所得額（円）,所得税（外貨）,地方税（外貨）,所得税（円）,地方税（円）,国内源泉徴収税額（外貨）")  # noqa E501
+    def write_records(self, file_path: str, japanese_stock_dividend_records: Sequence[JapaneseStockDividendRecord],
+                      global_stock_dividend_records: Sequence[GlobalStockDividendRecord], sha256: str) -> None:
+        """1ファイル分の行をUPSERTする。sha256はPDFファイルの内容のSHA-256。"""
+        table_params: List[Tuple[str, List[Tuple[Any, ...]]]] = []
+        records: Sequence[StockDividendRecord]
+        for table, records in (("japanese_stock_dividend", japanese_stock_dividend_records),
+                               ("global_stock_dividend", global_stock_dividend_records)):
+            params: List[Tuple[Any, ...]] = []
+            seqs: Dict[Tuple[str, str], int] = {}
+            for record in records:
+                values = {f.name: sqlite_value(getattr(record, f.name)) for f in fields(cast(Any, record))}
+                values["payment_date"] = values["payment_date"] or ""
+                key = (values["code"], values["payment_date"])
+                seq = seqs.get(key, 0)
+                seqs[key] = seq + 1
+                params.append((sha256, seq, self.run_id, *values.values()))
+            table_params.append((table, params))
 
-    logger.info("処理開始")
+        for table, params in table_params:
+            self.connection.execute(f"DELETE FROM {table} WHERE file_path = ? AND source_sha256 <> ?",
+                                    (file_path, sha256))
+            self.connection.executemany(self.upsert_sqls[table], params)
+            self.connection.execute(f"DELETE FROM {table} WHERE source_sha256 = ? AND run_id <> ?", (sha256, self.run_id))
+            self.row_count += len(params)
+            self.pending_rows += len(params)
 
-    for root, _, files in os.walk(input_dir):
-        for file_name in files:
-            _, ext = os.path.splitext(file_name)
-            file_path = join(root, file_name)
+        if self.pending_rows >= self.batch_size:
+            self.connection.commit()
+            self.pending_rows = 0
 
-            if file_name.upper().endswith(".PDF.TXT"):
-                continue
+    def commit(self) -> None:
+        # 削除されたファイルの行を除外。-iで対象外となったファイルの行は残す。
+        for table in self.tables:
+            file_paths = [file_path for (file_path,) in self.connection.execute(f"SELECT DISTINCT file_path FROM {table}")]
+            self.connection.executemany(f"DELETE FROM {table} WHERE file_path = ?",
+                                        [(file_path,) for file_path in file_paths if not exists(file_path)])
+        self.connection.commit()
+        self.connection.close()
+        logger.info(f"{os.path.basename(self.path)} 更新終了: {self.row_count}行")
 
-            # 拡張子がpdfではない場合スキップ
-            if not ext.upper().endswith("PDF"):
-                logger.debug(f"ファイルスキップ： {file_path}")
-                continue
+    def abort(self) -> None:
+        self.connection.commit()
+        self.connection.close()
+        logger.warning(f"処理が中断されたため、出力済みの{self.row_count}行を保存しました: {self.path}")
 
-            if args.input and args.input not in file_path:
-                logger.debug(f"ファイルスキップ： {file_path}")
-                continue
+    def __enter__(self) -> "SqliteSink":
+        return self
+
+    def __exit__(self, exc_type: Type[BaseException] | None, exc_value: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+@dataclass
+class CacheEvent:
+    """抽出キャッシュの参照結果。ワーカーからインデックスを管理するメインプロセスへ返却する。"""
+    key: str
+    size: int
+    hit: bool
+
+
+class ExtractCache:
+    """PDFから抽出したテキストのキャッシュ。
 
-            logger.info(f"解析開始: {file_path}")
+    キーはPDFファイルの内容のSHA-256に、pdfminerのバージョンやLAParamsなどの抽出方法を加えたもの。
+    ファイル名ではなく内容で判定するため、PDFファイルを移動・リネームしてもキャッシュが利用される。
+    キャッシュデータは「<キャッシュディレクトリ>/<キー>.txt」に保存する。
+    「以下余白」のページまでで抽出を終了したテキストは、先頭にTRUNCATED_HEADERの行を付けて保存する。
 
-            # PDFをテキストに変換。
-            # file_path + ".txt"のファイルが存在する場合は、そちらを読み込む。
-            # 読み込みに失敗した場合は、file_path + ".txt"にテキストを出力するため、手修正して再度実行する。
-            text = read_rdf(file_path)
+    ワーカープロセスからも利用するため、インデックスの更新は行わず参照結果をeventsに記録するだけとする。
+    インデックスの更新はメインプロセスのExtractCacheIndexで行う。
+    """
+
+    TRUNCATED_HEADER: Final[str] = "#以下余白以降の抽出を省略\n"
+
+    def __init__(self, directory: str, extractor: "TextExtractor") -> None:
+        self.directory = directory
+        self.extractor = extractor
+        # 抽出方法を表す文字列（TextExtractor.cache_salt()）。
+        # pdfminerのバージョンを含むため、.pdf.txtのみを読み込む場合にpdfminerをインポートしないよう、キーの作成時に求める
+        self.salt: str | None = None
+        self.events: List[CacheEvent] = []
+
+    def make_key(self, data: bytes) -> str:
+        if self.salt is None:
+            self.salt = self.extractor.cache_salt()
+        sha256 = hashlib.sha256(self.salt.encode("utf-8"))
+        sha256.update(data)
+        return sha256.hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return join(self.directory, f"{key}.txt")
+
+    def get(self, key: str) -> Tuple[str, bool] | None:
+        """キャッシュのテキストと、「以下余白」のページまでで抽出を終了したテキストかを返却する。ない場合はNone。"""
+        try:
+            with open(self.entry_path(key), mode="r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+
+        self.events.append(CacheEvent(key, len(text.encode("utf-8")), True))
+        if text.startswith(self.TRUNCATED_HEADER):
+            return text[len(self.TRUNCATED_HEADER):], True
+        return text, False
+
+    def put(self, key: str, text: str, truncated: bool = False) -> None:
+        data = ((self.TRUNCATED_HEADER if truncated else "") + text).encode("utf-8")
+        entry_path = self.entry_path(key)
+        # 並列実行時に同じキーを同時に書き込んでも壊れないよう、一時ファイルに書き込んでからリネームする
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, mode="wb") as f:
+            f.write(data)
+        os.replace(tmp_path, entry_path)
+
+        self.events.append(CacheEvent(key, len(data), False))
+
+    def pop_events(self) -> List[CacheEvent]:
+        events = self.events
+        self.events = []
+        return events
+
+
+class ExtractCacheIndex:
+    """抽出キャッシュのインデックス。
+
+    「<キャッシュディレクトリ>/index.json」にエントリごとのサイズと最終参照日時、累計のヒット/ミス数を保存する。
+    保存時に合計サイズがmax_sizeを超えている場合は、最終参照日時が古いエントリから削除する（LRU）。
+    """
+
+    INDEX_FILE_NAME: Final[str] = "index.json"
 
-            save_text = False
+    def __init__(self, directory: str, max_size: int) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.entries: Dict[str, Dict[str, float]] = {}
+        self.total_hits = 0
+        self.total_misses = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        index_path = join(directory, self.INDEX_FILE_NAME)
+        if exists(index_path):
             try:
-                pdf_type = judge_pdf_type(text)
-
-                logger.debug(f"PDFタイプ： {pdf_type}")
-                if pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT \
-                    or pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT_VER_EDITED:
-                    for data in parse_japanese_stock_dividend_report(text, pdf_type):
-                        data.insert(0, file_path)
-                        japanese_stock_dividend_list.append(",".join(data))
-                else:
-                    for data in parse_global_stock_dividend_report(text, pdf_type):
-                        data.insert(0, file_path)
-                        global_stock_dividend_list.append(",".join(data))
-                
-                if args.force_save_text:
-                    save_text = True
-            except Exception as e:
-                logger.error(f"解析エラー: {file_path}")
-                save_text = True
-                raise e
-            finally:
-                if save_text and not exists(file_path + ".txt"):
-                    with open(file_path + ".txt", mode="w", encoding="utf-8") as f:
-                        f.write(text)
+                with open(index_path, mode="r", encoding="utf-8") as f:
+                    index = json.load(f)
+                self.entries = index["entries"]
+                self.total_hits = index["stats"]["hits"]
+                self.total_misses = index["stats"]["misses"]
+            except (ValueError, KeyError) as e:
+                logger.warning(f"キャッシュインデックスの読み込みに失敗したため、再作成します: {index_path}, {repr(e)}")
+                self.entries = {}
 
-            logger.info(f"解析終了: {file_path}")
+    def record(self, events: List[CacheEvent]) -> None:
+        now = time.time()
+        for event in events:
+            if event.hit:
+                self.hits += 1
+                self.total_hits += 1
+            else:
+                self.misses += 1
+                self.total_misses += 1
+            self.entries[event.key] = {"size": event.size, "last_access": now}
 
+    @property
+    def total_size(self) -> int:
+        return sum(int(entry["size"]) for entry in self.entries.values())
 
-    logger.info("japanese_stock_dividend.csv 作成開始")
-    list2csv(join(output_dir, "japanese_stock_dividend.csv"), japanese_stock_dividend_list)
+    def evict(self) -> None:
+        """合計サイズがmax_size以下になるまで、最終参照日時が古いエントリから削除する。"""
+        total_size = self.total_size
+        if total_size <= self.max_size:
+            return
 
-    logger.info("global_stock_dividend.csv 作成開始")
-    list2csv(join(output_dir, "global_stock_dividend.csv"), global_stock_dividend_list)
+        for key in sorted(self.entries, key=lambda k: self.entries[k]["last_access"]):
+            if total_size <= self.max_size:
+                break
+            total_size -= int(self.entries[key]["size"])
+            del self.entries[key]
+            self.evictions += 1
+            try:
+                os.remove(join(self.directory, f"{key}.txt"))
+            except FileNotFoundError:
+                pass
 
-    logger.info("処理終了")
+    def save(self) -> None:
+        self.evict()
 
+        index = {
+            "entries": self.entries,
+            "stats": {"hits": self.total_hits, "misses": self.total_misses},
+        }
+        index_path = join(self.directory, self.INDEX_FILE_NAME)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, mode="w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
 
-if __name__ == "__main__":
-    formatter = '%(asctime)s [%(levelname)s]: %(message)s'
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0.0
+        return (f"ヒット={self.hits}, ミス={self.misses}, ヒット率={hit_rate:.1f}%, 削除={self.evictions}, "
+                f"エントリ数={len(self.entries)}, サイズ={self.total_size:,}バイト, "
+                f"累計ヒット={self.total_hits}, 累計ミス={self.total_misses}")
 
-    stdout_handler = logging.StreamHandler(sys.stdout)
-    stdout_handler.setFormatter(logging.Formatter(formatter))
 
-    logger.setLevel(logging.DEBUG)
-    logger.addHandler(stdout_handler)
-    # logging.basicConfig(level=logger.DEBUG, format=formatter)
+class TextPack:
+    """PDFから抽出したテキストを1ファイルにまとめて保存するパック（--text-pack）。
+
+    ファイルパスごとのテキストをzlibで圧縮して追記し、末尾にインデックス（ファイルパス→位置、JSON）とフッターを書き込む。
+    読み込みはmmapで行い、インデックスの位置の圧縮されたテキストをコピーせずに展開する。
+    追記は最後のフッターの後ろに行い、save()でインデックスとフッターを書き込むまで読み込みには反映しない。
+    書き込み中に中断した場合は、最後の有効なフッターまでを利用する（次回の書き込み時に切り詰める）。
+
+    キーはカレントディレクトリからのPDFファイルの相対パス（serveで絶対パスを受け取った場合も同じキーとなる）。
+    PDFから抽出したテキストは、PDFのサイズと更新日時が保存時と一致する場合のみ利用する。
+    import-textで取り込んだ手修正のテキストは、.pdf.txtと同様に常に利用する。
+    「以下余白」のページまでで抽出を終了したテキストは、エントリに記録する（抽出キャッシュと同様）。
+    書き込みはメインプロセスのみで行う。ワーカープロセスへはパスとインデックスの位置のみを渡し、
+    プロセスごとに1回だけ開く（open_text_pack()）。
+    """
+
+    MAGIC: Final[bytes] = b"SBITXTP1"
+    FOOTER_MAGIC: Final[bytes] = b"SBITXTI1"
+    # インデックスの位置、インデックスの長さ、FOOTER_MAGIC
+    FOOTER: Final[struct.Struct] = struct.Struct("<QQ8s")
+    # 不要になった領域（置き換えられたテキスト、古いインデックス）がこのサイズを超え、
+    # 有効なテキストの合計サイズより大きい場合は、save()時に詰め直す
+    COMPACT_MIN_SIZE: Final[int] = 1024 * 1024
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # キー（key()）→[位置, 長さ, PDFのサイズ, PDFの更新日時, 手修正のテキストか, 以下余白で抽出を終了したテキストか]
+        # 以下余白で抽出を終了したテキストかは、追加前に保存したエントリにはない
+        self.entries: Dict[str, List[Any]] = {}
+        # 最後の有効なフッターの終端。ファイルがない場合は0
+        self.index_end = 0
+        self.stamp: Tuple[int, int] | None = None
+        self.mm: mmap.mmap | None = None
+        # 追記用のファイルと、save()前のエントリ
+        self.file: BinaryIO | None = None
+        self.pending: Dict[str, List[Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """パックを開き、最後の有効なフッターからインデックスを読み込む。"""
+        self.close()
+        self.entries = {}
+        self.index_end = 0
+        self.stamp = None
+        if not exists(self.path):
+            return
+
+        with open(self.path, mode="rb") as f:
+            stat = os.fstat(f.fileno())
+            self.stamp = (stat.st_size, stat.st_mtime_ns)
+            if stat.st_size == 0:
+                return
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError(f"テキストパックの形式が不正です: {self.path}")
+
+        pos = self.mm.rfind(self.FOOTER_MAGIC)
+        while pos >= 0:
+            footer_start = pos + len(self.FOOTER_MAGIC) - self.FOOTER.size
+            if footer_start >= len(self.MAGIC):
+                index_offset, index_length, _ = self.FOOTER.unpack_from(self.mm, footer_start)
+                if index_offset + index_length == footer_start:
+                    try:
+                        self.entries = json.loads(self.mm[index_offset:footer_start])["entries"]
+                        self.index_end = pos + len(self.FOOTER_MAGIC)
+                        return
+                    except (ValueError, KeyError):
+                        pass
+            pos = self.mm.rfind(self.FOOTER_MAGIC, 0, pos)
+        # インデックスの書き込み前に中断した場合は空とする
+        self.index_end = len(self.MAGIC)
+
+    def refresh(self) -> None:
+        """他のプロセスで更新された場合は開き直す（serve用）。"""
+        try:
+            stat = os.stat(self.path)
+            stamp: Tuple[int, int] | None = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self.stamp:
+            self.load()
+
+    @staticmethod
+    def key(file_path: str) -> str:
+        return os.path.relpath(file_path)
+
+    def lookup(self, file_path: str) -> List[Any] | None:
+        """利用できるエントリを返却する。ないか、PDFが保存時から変更されている場合はNone。"""
+        entry = self.entries.get(self.key(file_path))
+        if entry is None:
+            return None
+        if not entry[4]:
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                return None
+            if (stat.st_size, stat.st_mtime_ns) != (entry[2], entry[3]):
+                return None
+        return entry
+
+    def get(self, file_path: str) -> Tuple[str, bool] | None:
+        """テキストと、「以下余白」のページまでで抽出を終了したテキストかを返却する。利用できない場合はNone。"""
+        entry = self.lookup(file_path)
+        if entry is None or self.mm is None:
+            return None
+        offset, length = entry[0], entry[1]
+        with memoryview(self.mm)[offset:offset + length] as view:
+            return zlib.decompress(view).decode("utf-8"), len(entry) > 5 and bool(entry[5])
+
+    def put(self, file_path: str, text: str, edited: bool = False, truncated: bool = False) -> None:
+        """テキストを追記する。save()を呼び出すまで読み込みには反映しない。"""
+        if self.file is None:
+            self.file = open(self.path, mode="r+b" if self.index_end > 0 else "w+b")
+            if self.index_end == 0:
+                self.file.write(self.MAGIC)
+                self.index_end = len(self.MAGIC)
+            # 中断した書き込みを切り詰める
+            self.file.truncate(self.index_end)
+            self.file.seek(self.index_end)
+
+        data = zlib.compress(text.encode("utf-8"))
+        stat = os.stat(file_path)
+        self.pending[self.key(file_path)] = [self.file.tell(), len(data), stat.st_size, stat.st_mtime_ns, edited, truncated]
+        self.file.write(data)
+
+    def save(self) -> None:
+        """追記したテキストのインデックスとフッターを書き込み、開き直す。"""
+        if self.file is None:
+            return
+        self.entries.update(self.pending)
+        self.pending = {}
+
+        index = json.dumps({"entries": self.entries}, ensure_ascii=False).encode("utf-8")
+        index_offset = self.file.tell()
+        self.file.write(index)
+        self.file.write(self.FOOTER.pack(index_offset, len(index), self.FOOTER_MAGIC))
+        self.file.close()
+        self.file = None
+        self.load()
+
+        live_size = sum(entry[1] for entry in self.entries.values())
+        garbage_size = self.index_end - len(self.MAGIC) - live_size
+        if garbage_size > max(live_size, self.COMPACT_MIN_SIZE):
+            self.compact()
+
+    def compact(self) -> None:
+        """有効なテキストのみを新しいファイルに書き込み、置き換える。"""
+        assert self.mm is not None
+        logger.debug(f"テキストパックを詰め直し: {self.path}")
+        entries: Dict[str, List[Any]] = {}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, mode="wb") as f:
+            f.write(self.MAGIC)
+            for key, entry in self.entries.items():
+                entries[key] = [f.tell()] + entry[1:]
+                f.write(self.mm[entry[0]:entry[0] + entry[1]])
+            index = json.dumps({"entries": entries}, ensure_ascii=False).encode("utf-8")
+            index_offset = f.tell()
+            f.write(index)
+            f.write(self.FOOTER.pack(index_offset, len(index), self.FOOTER_MAGIC))
+        self.close()
+        os.replace(tmp_path, self.path)
+        self.load()
+
+    def close(self) -> None:
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (open_text_pack, (self.path, self.index_end))
+
+
+# プロセスごとに開いたテキストパック（ワーカープロセス用）
+text_pack_instances: Dict[str, TextPack] = {}
+
+
+def open_text_pack(path: str, index_end: int) -> TextPack:
+    """ワーカープロセスでテキストパックを開く。同じ状態（インデックスの位置）のパックは開き直さない。"""
+    text_pack = text_pack_instances.get(path)
+    if text_pack is None or text_pack.index_end != index_end:
+        if text_pack is not None:
+            text_pack.close()
+        text_pack = TextPack(path)
+        text_pack_instances[path] = text_pack
+    return text_pack
+
+
+def iter_pdf_pages(pdf_file: BytesIO | str, laparams: "LAParams | None" = None) -> Generator[str, None, None]:
+    """PDFからページ単位でテキストを抽出する。
+
+    pdfminerのextract_text()と同じ処理をページ単位で行う。各ページのテキストは末尾に\fが付与されるため、
+    すべてのページを結合するとextract_text()の返却値と同じになる。
+    ページのレイアウト解析は次のページが要求された時点で行う。
+
+    Args:
+        pdf_file: PDFファイルパスまたはPDFファイルの内容
+        laparams: レイアウト解析のパラメータ。Noneの場合はデフォルト値。
+    """
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.pdfpage import PDFPage
+
+    if laparams is None:
+        laparams = LAParams()
+
+    with StringIO() as output_string:
+        rsrcmgr = PDFResourceManager(caching=True)
+        device = TextConverter(rsrcmgr, output_string, laparams=laparams)
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+
+        fp = open(pdf_file, mode="rb") if isinstance(pdf_file, str) else pdf_file
+        try:
+            for page in PDFPage.get_pages(fp, caching=True):
+                interpreter.process_page(page)
+                yield output_string.getvalue()
+                output_string.seek(0)
+                output_string.truncate(0)
+        finally:
+            device.close()
+            if isinstance(pdf_file, str):
+                fp.close()
+
+
+def count_pdf_pages(data: bytes) -> int:
+    """PDFのページ数を返却する。ページのレイアウト解析は行わない。"""
+    from pdfminer.pdfpage import PDFPage
+
+    return sum(1 for _ in PDFPage.get_pages(BytesIO(data)))
+
+
+class PdfText:
+    """PDFから抽出したテキスト。
+
+    PDFから抽出する場合は、ページ単位で必要になった時点で抽出する。
+    .pdf.txtやキャッシュから読み込んだ場合は、テキスト全体を1ページとして扱う。
+    originは読み込み元（pdf: PDFから抽出、roi: ROI抽出、cache: 抽出キャッシュ、sidecar: .pdf.txt、pack: テキストパック）。
+    truncatedは、抽出キャッシュやテキストパックのテキストが「以下余白」のページまでで、以降のページの抽出を省略しているか。
+    """
+
+    def __init__(self, pages: Iterator[str], cache_key: str | None = None, extractor: "TextExtractor | None" = None,
+                 origin: str = "pdf") -> None:
+        self.extracted_pages: List[str] = []
+        self.remaining_pages = pages
+        # PDFから抽出した場合のキャッシュのキー。キャッシュから読み込んだ場合などはNone
+        self.cache_key = cache_key
+        # PDFから抽出した場合の抽出方法。.pdf.txtやキャッシュから読み込んだ場合はNone
+        self.extractor = extractor
+        self.origin = origin
+        self.complete = False
+        self.truncated = False
+        # ファイルの読み込み時間、テキストの抽出時間（秒）
+        self.read_seconds = 0.0
+        self.extract_seconds = 0.0
+        # 指定した場合は、ページの抽出をextractの処理段階としてプロファイルする（--profile）
+        self.profiler: "StageProfiler | None" = None
+        # PDFから抽出した場合のPDFファイルの内容（document_page_count()用）
+        self.data: bytes | None = None
+        self.total_pages: int | None = None
+
+    @classmethod
+    def from_text(cls, text: str, cache_key: str | None = None, extractor: "TextExtractor | None" = None,
+                  origin: str = "pdf", truncated: bool = False) -> "PdfText":
+        source = cls(iter([]), cache_key, extractor, origin)
+        source.extracted_pages.append(text)
+        source.complete = True
+        source.truncated = truncated
+        return source
+
+    def next_page(self) -> str | None:
+        """次のページを抽出する。すべてのページを抽出済みの場合はNoneを返却する。"""
+        start = time.perf_counter()
+        with profile_stage(self.profiler, "extract"):
+            page = next(self.remaining_pages, None)
+        self.extract_seconds += time.perf_counter() - start
+        if page is None:
+            self.complete = True
+            return None
+        self.extracted_pages.append(page)
+        return page
+
+    def first_page(self) -> str:
+        if not self.extracted_pages:
+            self.next_page()
+        return self.extracted_pages[0] if self.extracted_pages else ""
+
+    def pages(self) -> Generator[str, None, None]:
+        """抽出済みのページから順に返却し、以降は必要になった時点で抽出する。"""
+        i = 0
+        while i < len(self.extracted_pages) or self.next_page() is not None:
+            yield self.extracted_pages[i]
+            i += 1
+
+    def extracted_text(self) -> str:
+        """抽出済みのページのテキスト"""
+        return "".join(self.extracted_pages)
+
+    def read(self) -> str:
+        """残りのページをすべて抽出して、テキスト全体を返却する。"""
+        while self.next_page() is not None:
+            pass
+        return self.extracted_text()
+
+    def document_page_count(self) -> int | None:
+        """PDFのページ数。抽出していないページも含む。PDFから抽出していない場合はNone。"""
+        if self.complete and self.origin == "pdf":
+            return len(self.extracted_pages)
+        if self.data is None:
+            return None
+        if self.total_pages is None:
+            start = time.perf_counter()
+            with profile_stage(self.profiler, "extract"):
+                self.total_pages = count_pdf_pages(self.data)
+            self.extract_seconds += time.perf_counter() - start
+        return self.total_pages
+
+    def page_count(self) -> int:
+        """抽出済みのページ数。テキスト全体を1ページとして扱っている場合は、テキスト内の改ページの数。"""
+        if self.origin == "pdf":
+            return len(self.extracted_pages)
+        return max(self.extracted_text().count("\f"), 1)
+
+    def close(self) -> None:
+        if isinstance(self.remaining_pages, Generator):
+            self.remaining_pages.close()
+
+
+def iter_page_chars(data: bytes) -> Generator[List["LTChar"], None, None]:
+    """PDFからページ単位で文字（LTChar）を抽出する。
+
+    レイアウト解析（文字の行・ボックスへのグループ化や読み順の並べ替え）は行わない。
+    """
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.layout import LTChar, LTContainer
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.pdfpage import PDFPage
+
+    rsrcmgr = PDFResourceManager(caching=True)
+    device = PDFPageAggregator(rsrcmgr, laparams=None)
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+
+    def collect(item: "LTItem", chars: List[LTChar]) -> None:
+        if isinstance(item, LTChar):
+            chars.append(item)
+        elif isinstance(item, LTContainer):
+            for child in item:
+                collect(child, chars)
+
+    for page in PDFPage.get_pages(BytesIO(data), caching=True):
+        interpreter.process_page(page)
+        chars: List[LTChar] = []
+        collect(device.get_result(), chars)
+        yield chars
+
+
+def group_chars_into_lines(chars: List["LTChar"]) -> List[Tuple[Tuple[float, float, float, float], str]]:
+    """文字を縦位置で行にまとめる。
+
+    文字の中心の縦位置が、行の中心から文字の高さの半分以内であれば同じ行とみなす。
+
+    Returns:
+        List[Tuple[行の座標(x0, y0, x1, y1), 行の文字列]]: 上の行から順
+    """
+    lines: List[List["LTChar"]] = []
+    for char in sorted(chars, key=lambda c: -(c.y0 + c.y1) / 2):
+        center = (char.y0 + char.y1) / 2
+        if lines:
+            line_center = (lines[-1][0].y0 + lines[-1][0].y1) / 2
+            if abs(center - line_center) <= max(char.height, 1) / 2:
+                lines[-1].append(char)
+                continue
+        lines.append([char])
+
+    result = []
+    for line in lines:
+        line.sort(key=lambda c: c.x0)
+        bbox = (min(c.x0 for c in line), min(c.y0 for c in line), max(c.x1 for c in line), max(c.y1 for c in line))
+        result.append((bbox, "".join(c.get_text() for c in line)))
+    return result
+
+
+def dump_layout(file_path: str) -> None:
+    """ROI設定ファイル作成用に、PDFの各行の座標と文字列を標準出力に出力する。"""
+    with open(file_path, mode="rb") as f:
+        data = f.read()
+
+    print(f"# {file_path}")
+    for page_number, chars in enumerate(iter_page_chars(data), start=1):
+        for (x0, y0, x1, y1), text in group_chars_into_lines(chars):
+            print(f"{page_number}\t[{x0:.1f}, {y0:.1f}, {x1:.1f}, {y1:.1f}]\t{text}")
+
+
+# ROIで抽出した外国株式の項目を、GLOBAL_STOCK_DIVIDEND_REPORT_VER2の56行のデータのどの行に出力するか
+roi_global_line_indexes: Final[Dict[str, List[int]]] = {
+    "配当金等支払日": [0], "国内支払日": [2], "現地基準日": [4], "銘柄コード": [6], "銘柄名": [8],
+    "外国源泉税率（%）": [14], "1単位あたり金額": [16], "数量": [18], "配当金等金額": [20], "外国源泉徴収税額": [22],
+    "外国手数料": [24], "外国精算金額（外貨）": [26], "国内源泉徴収税額（外貨）": [28, 54], "受取金額": [34],
+    "申告レート基準日": [36], "為替レート基準日": [37], "申告レート": [39], "為替レート": [40], "配当金等金額（円）": [42],
+    "外国源泉徴収税額（円）": [44], "国内課税所得額（円）": [46], "所得税（外貨）": [48], "所得税（円）": [49],
+    "地方税（外貨）": [51], "地方税（円）": [52],
+}
+
+# ROIで抽出できる国内株式の項目
+roi_japanese_fields: Final[List[str]] = japanese_stock_dividend_header[1:]
+
+RoiRegions = Dict[PdfType, List[Dict[str, Tuple[float, float, float, float]]]]
+
+
+def load_roi_config(config_path: str) -> Tuple[RoiRegions, str]:
+    """ROI設定ファイルを読み込む。
+
+    設定ファイルはPDFタイプ名ごとに、1ページ内の銘柄（レコード）ごとの各項目の領域を
+    PDFの座標（左下原点、単位はポイント）で記載する。座標は--dump-layoutの出力を参考にする。
+
+    ```
+    {
+      "JAPANESE_STOCK_DIVIDEND_REPORT": {
+        "records": [
+          {"銘柄名": [x0, y0, x1, y1], "銘柄コード": [x0, y0, x1, y1], ...},  # 1銘柄目
+          {"銘柄名": [x0, y0, x1, y1], ...}                                     # 2銘柄目
+        ]
+      },
+      "GLOBAL_STOCK_DIVIDEND_REPORT_VER2": {
+        "records": [{"配当金等支払日": [x0, y0, x1, y1], ...}]
+      }
+    }
+    ```
+
+    Returns:
+        Tuple[PDFタイプごとの領域, 設定ファイルの内容のSHA-256（キャッシュのキー用）]
+    """
+    with open(config_path, mode="rb") as f:
+        content = f.read()
+
+    regions: RoiRegions = {}
+    for type_name, type_config in json.loads(content.decode("utf-8")).items():
+        pdf_type = PdfType[type_name]
+        if pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT_VER_EDITED:
+            raise ValueError(f"ROI設定ファイルに指定できないPDFタイプです: {type_name}")
+
+        allowed_fields = roi_japanese_fields if pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT else list(roi_global_line_indexes)
+        records = []
+        for record_config in type_config["records"]:
+            for field_name, bbox in record_config.items():
+                if field_name not in allowed_fields:
+                    raise ValueError(f"ROI設定ファイルの項目名が不正です: {type_name}, {field_name}")
+                if len(bbox) != 4:
+                    raise ValueError(f"ROI設定ファイルの座標が不正です: {type_name}, {field_name}, {bbox}")
+            records.append({field_name: cast(Tuple[float, float, float, float], tuple(bbox)) for field_name, bbox in record_config.items()})
+        regions[pdf_type] = records
+
+    return regions, hashlib.sha256(content).hexdigest()
+
+
+def extract_cell_text(chars: List["LTChar"], bbox: Tuple[float, float, float, float]) -> str:
+    """中心が領域内にある文字を抽出する。複数行の場合は結合する。"""
+    x0, y0, x1, y1 = bbox
+    cell_chars = [c for c in chars if x0 <= (c.x0 + c.x1) / 2 <= x1 and y0 <= (c.y0 + c.y1) / 2 <= y1]
+    return "".join(text for _, text in group_chars_into_lines(cell_chars)).strip()
+
+
+def render_japanese_roi_records(records: List[Dict[str, str]]) -> str:
+    """ROIで抽出した国内株式の項目を、手修正されたフォーマット（JAPANESE_STOCK_DIVIDEND_REPORT_VER_EDITED）のテキストにする。
+
+    手修正フォーマットと同じ形式のため、解析エラー時に出力される.pdf.txtもそのまま手修正できる。
+    """
+    def cell(record: Dict[str, str], field_name: str) -> str:
+        # parse_data()は半角スペースで項目を分割するため、項目内の半角スペースは除去
+        return record.get(field_name, "").replace(" ", "")
+
+    output = ["#手修正済み（ROI抽出）"]
+    for no, record in enumerate(records, start=1):
+        output.append(f"#{no}")
+        output.append(record.get("銘柄名", ""))
+        output.append(cell(record, "銘柄コード"))
+        output.append(" ".join(cell(record, f) for f in ["お支払日", "配当単価（円）", "数量（株数・口数）"]))
+        output.append(" ".join(cell(record, f) for f in ["配当金額（税引前）（円）", "所得税（円）", "地方税（円）"]))
+        output.append(" ".join(cell(record, f) for f in ["端数処理代金（円）", "お受取金額（円）"]))
+    return "\n".join(output) + "\n"
+
+
+def render_global_roi_records(records: List[Dict[str, str]]) -> str:
+    """ROIで抽出した外国株式の項目を、GLOBAL_STOCK_DIVIDEND_REPORT_VER2のテキスト（1銘柄56行）にする。"""
+    output = ["TWCODE:ROI", ""]
+    for record in records:
+        lines = [""] * 56
+        for field_name, indexes in roi_global_line_indexes.items():
+            for index in indexes:
+                lines[index] = record.get(field_name, "")
+        output.extend(lines)
+    return "\n".join(output) + "\n"
+
+
+extract_modes: Final[List[str]] = ["full", "fast"]
+
+# 抽出モードごとのレイアウト解析のパラメータ（LAParamsのデフォルト値から変更するもの）。抽出キャッシュのキーにも含める。
+extract_mode_laparams: Final[Dict[str, Dict[str, Any]]] = {
+    "full": {},
+    "fast": {"boxes_flow": None},
+}
+
+
+def create_laparams(extract_mode: str) -> "LAParams":
+    """抽出モードに応じたレイアウト解析のパラメータを返却する。
+
+    - full: pdfminerのデフォルト値（extract_text()と同じ）
+    - fast: テキストボックスの階層的なグループ化と読み順の並べ替え（boxes_flow）を行わず、
+      テキストボックスを上から順に並べる。それ以外のパラメータはfullと同じ。
+      テキストボックスのグループ化はページ内の全テキストボックスの組み合わせを評価するため、
+      レイアウト解析で最も時間がかかる処理となっている。
+      fullへの再抽出（TextExtractor.fallback）は解析で例外が発生した場合のみ行うため、
+      読み順が変わっても解析できてしまうPDFでは、誤った行がエラーにならずに出力される。
+
+    Args:
+        extract_mode: 抽出モード（extract_modesのいずれか）
+    """
+    from pdfminer.layout import LAParams
+
+    if extract_mode not in extract_mode_laparams:
+        raise ValueError(f"対応していない抽出モードです: {extract_mode}")
+    return LAParams(**extract_mode_laparams[extract_mode])
+
+
+class TextExtractor:
+    """PDFからテキストを抽出する。
+
+    まず1ページ目のみ抽出してPDFタイプを判定し、解析対象外のPDFの場合は2ページ目以降の抽出を行わずに
+    UnsupportedPdfErrorを送出する。
+    ROI設定がある場合は、ページ全体のレイアウト解析を行わず、設定した領域の文字のみを抽出して
+    既存の解析処理が扱えるテキストにする（render_japanese_roi_records()、render_global_roi_records()）。
+    fallbackには、抽出したテキストを解析できなかった場合に再抽出する抽出方法を指定する（fastモードの場合のfullモード）。
+
+    プロセスプールのワーカーへ渡すため、pickle可能なデータのみを保持する。
+    pdfminerをインポートしないよう、レイアウト解析のパラメータ（LAParams）は抽出時に作成する。
+    """
+
+    def __init__(self, extract_mode: str = "full", roi_regions: RoiRegions | None = None, roi_digest: str = "",
+                 fallback: "TextExtractor | None" = None) -> None:
+        self.extract_mode = extract_mode
+        self.roi_regions = roi_regions if roi_regions is not None else {}
+        self.roi_digest = roi_digest
+        self.fallback = fallback
+
+    @classmethod
+    def create(cls, extract_mode: str, roi_regions: RoiRegions | None = None, roi_digest: str = "") -> "TextExtractor":
+        """抽出モードに応じたTextExtractorを作成する。fastモードの場合はfullモードをfallbackに設定する。"""
+        extractor = cls("full", roi_regions, roi_digest)
+        if extract_mode != "full":
+            extractor = cls(extract_mode, roi_regions, roi_digest, fallback=extractor)
+        return extractor
+
+    @property
+    def laparams(self) -> "LAParams":
+        return create_laparams(self.extract_mode)
+
+    def cache_salt(self) -> str:
+        """抽出キャッシュのキーに含める、抽出方法を表す文字列。
+
+        キャッシュから読み込む場合にpdfminerをインポートしないよう、pdfminerのバージョンはパッケージのメタデータから取得し、
+        レイアウト解析のパラメータは抽出モードごとのデフォルト値からの変更点とする（デフォルト値はバージョンで決まる）。
+        """
+        if self.extract_mode not in extract_mode_laparams:
+            raise ValueError(f"対応していない抽出モードです: {self.extract_mode}")
+        salt = (f"pdfminer={importlib.metadata.version('pdfminer.six')};"
+                f"laparams={sorted(extract_mode_laparams[self.extract_mode].items())}")
+        if self.roi_regions:
+            salt += f";roi={self.roi_digest}"
+        return salt
+
+    def open(self, file_path: str, data: bytes, cache_key: str | None = None) -> PdfText:
+        """PDFからテキストを抽出する。2ページ目以降は必要になった時点で抽出する。
+
+        Args:
+            file_path: PDFファイルパス（ログ出力用）
+            data: PDFファイルの内容
+            cache_key: 抽出キャッシュのキー
+        """
+        logger.debug(f"PDFファイル読み込み： {file_path}")
+        source = PdfText(iter_pdf_pages(BytesIO(data), self.laparams), cache_key, self)
+        source.data = data
+        start = time.perf_counter()
+
+        try:
+            pdf_type = judge_pdf_type(source.first_page())
+        except NotImplementedError:
+            source.close()
+            raise UnsupportedPdfError(f"解析対象外のPDFです: {file_path}")
+        logger.debug(f"PDFタイプ（1ページ目）： {pdf_type}")
+
+        if pdf_type in self.roi_regions:
+            source.close()
+            logger.debug(f"ROI抽出： {file_path}")
+            roi_source = PdfText.from_text(self.extract_roi(data, pdf_type), cache_key, self, origin="roi")
+            roi_source.extract_seconds = time.perf_counter() - start
+            return roi_source
+
+        return source
+
+    def extract_roi(self, data: bytes, pdf_type: PdfType) -> str:
+        records: List[Dict[str, str]] = []
+        for chars in iter_page_chars(data):
+            for record_regions in self.roi_regions[pdf_type]:
+                record = {field_name: extract_cell_text(chars, bbox) for field_name, bbox in record_regions.items()}
+
+                if pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT:
+                    # 銘柄名が空または「以下余白」の場合は最終ページのため終了
+                    name = record.get("銘柄名", "")
+                    if name == "" or "以下余白" in name:
+                        return render_japanese_roi_records(records)
+                elif not any(record.values()):
+                    continue
+
+                records.append(record)
+
+        if pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT:
+            return render_japanese_roi_records(records)
+        return render_global_roi_records(records)
+
+
+def read_rdf(file_path: str, cache: ExtractCache | None = None, extractor: TextExtractor | None = None,
+             data: bytes | None = None, sidecar: bool = True, only_cached: bool = False,
+             text_pack: TextPack | None = None) -> PdfText:
+    """.pdf.txt、テキストパック、抽出キャッシュ、PDFの順にテキストを読み込む。
+
+    .pdf.txtや抽出キャッシュの読み込み時間、PDFファイルの読み込み時間はPdfText.read_secondsに記録する。
+    dataを指定した場合は、PDFファイルを読み込まずにdataを内容として利用する（パイプラインで読み込み済みの場合）。
+    sidecarがFalseの場合は、.pdf.txtとテキストパックを読み込まない（サーバーモードでPDFの内容を受け取った場合）。
+    only_cachedがTrueの場合は、PDFからの抽出を行わずにNotCachedErrorを送出する。
+    """
+    if extractor is None:
+        extractor = TextExtractor()
+
+    start = time.perf_counter()
+
+    txt_file_path = file_path + ".txt"
+    if sidecar and exists(txt_file_path):
+        logger.debug(f"テキストファイル読み込み： {txt_file_path}")
+        with open(txt_file_path, mode="r", encoding="utf-8") as f:
+            source = PdfText.from_text(f.read(), origin="sidecar")
+        source.read_seconds = time.perf_counter() - start
+        return source
+
+    if sidecar and text_pack is not None:
+        packed = text_pack.get(file_path)
+        if packed is not None:
+            logger.debug(f"テキストパック読み込み： {file_path}")
+            source = PdfText.from_text(packed[0], origin="pack", truncated=packed[1])
+            source.read_seconds = time.perf_counter() - start
+            return source
+
+    if data is None:
+        with open(file_path, mode="rb") as f:
+            data = f.read()
+
+    key: str | None = None
+    if cache is not None:
+        key = cache.make_key(data)
+        cached = cache.get(key)
+        if cached is not None:
+            logger.debug(f"キャッシュ読み込み： {file_path}, キー={key}")
+            source = PdfText.from_text(cached[0], origin="cache", truncated=cached[1])
+            source.read_seconds = time.perf_counter() - start
+            return source
+
+    if only_cached:
+        raise NotCachedError(f"抽出済みのテキスト（.pdf.txt、テキストパック、抽出キャッシュ）がありません: {file_path}")
+
+    read_seconds = time.perf_counter() - start
+    source = extractor.open(file_path, data, key)
+    source.read_seconds = read_seconds
+    return source
+
+
+# 計測する処理段階
+# read: .pdf.txt・抽出キャッシュ・PDFファイルの読み込み、extract: テキスト抽出、classify: PDFタイプ判定、parse: 解析、
+# save: .pdf.txtと抽出キャッシュへの保存、csv: CSVへの出力
+metrics_stages: Final[List[str]] = ["read", "extract", "classify", "parse", "save", "csv"]
+
+
+@dataclass
+class FileMetrics:
+    """1ファイル分の計測結果。
+
+    プロセスプールのワーカーから返却されるため、pickle可能なデータのみを保持する。
+    cache_hitは抽出キャッシュを利用しない場合や.pdf.txtから読み込んだ場合はNone。
+    """
+    file_path: str
+    source: str = ""
+    pages: int = 0
+    rows: int = 0
+    cache_hit: bool | None = None
+    fallback: bool = False
+    skipped: bool = False
+    total_seconds: float = 0.0
+    seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(metrics_stages, 0.0))
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.seconds[stage] += seconds
+
+    def record_source(self, source: PdfText) -> None:
+        """読み込み元、ページ数、読み込み時間と抽出時間を記録する。"""
+        self.source = source.origin
+        self.pages = source.page_count()
+        self.add("read", source.read_seconds)
+        self.add("extract", source.extract_seconds)
+        source.read_seconds = source.extract_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "file_path": self.file_path,
+            "source": self.source,
+            "pages": self.pages,
+            "rows": self.rows,
+            "cache_hit": self.cache_hit,
+            "fallback": self.fallback,
+            "skipped": self.skipped,
+            "seconds": {**self.seconds, "total": self.total_seconds},
+        }
+
+
+# プロファイルする処理段階（--profile）
+# extract: テキスト抽出（.pdf.txt・抽出キャッシュ・PDFファイルの読み込みを含む）、classify: PDFタイプ判定、
+# parse: 解析（解析中に行われたページの抽出は含まない）、csv: CSV（と列指向のファイル、SQLite）への出力
+profile_stages: Final[List[str]] = ["extract", "classify", "parse", "csv"]
+
+
+class StageProfiler:
+    """処理段階ごとのプロファイラ（--profile）。
+
+    処理段階ごとにcProfile.Profileを持ち、stage()のwithブロック内でのみ有効にする。
+    解析中にページを抽出する場合など、処理段階が入れ子になる場合は外側の処理段階のプロファイラを一時停止するため、
+    pdfminerの処理が解析の処理段階に含まれることはない。
+    Python 3.12以降のcProfileは、有効にしている間はプロセス内のすべてのスレッドの処理を計測し、同時に1つしか有効にできない。
+    そのため、処理段階はプロセス内のロックで排他し、--profileを指定した場合は-j 1でも解析をプロセスプールのワーカーで行う
+    （extract・classify・parseには、メインプロセスのパイプラインのスレッドの処理は含まれない）。
+    メインプロセスで計測するcsvには、同時に実行されたPDFファイルの読み込みやイベントループ、プロセスプールの管理の
+    スレッドの処理も含まれる。
+    """
+    lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self) -> None:
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.active: List[str] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[None, None, None]:
+        if self.active:
+            self.profiles[self.active[-1]].disable()
+        else:
+            self.lock.acquire()
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        self.active.append(name)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.active.pop()
+            if self.active:
+                self.profiles[self.active[-1]].enable()
+            else:
+                self.lock.release()
+
+    def collect(self) -> Dict[str, Dict[Any, Any]]:
+        """処理段階ごとの統計情報（pstats形式、pickle可能）を返却する。"""
+        stats: Dict[str, Dict[Any, Any]] = {}
+        for name, profile in self.profiles.items():
+            profile.create_stats()
+            stats[name] = cast(Dict[Any, Any], getattr(profile, "stats"))
+        return stats
+
+    @classmethod
+    def reset_lock(cls) -> None:
+        cls.lock = threading.Lock()
+
+
+# ロックを保持したスレッドはforkした子プロセス（プロセスプールのワーカー）には存在しないため、子プロセスではロックを作り直す
+os.register_at_fork(after_in_child=StageProfiler.reset_lock)
+
+
+def profile_stage(profiler: StageProfiler | None, stage: str) -> ContextManager[None]:
+    """profilerを指定した場合は、withブロック内の処理をstageの処理段階としてプロファイルする。"""
+    return profiler.stage(stage) if profiler is not None else nullcontext()
+
+
+@dataclass
+class FileFailure:
+    """解析に失敗したファイル（--keep-going用）。
+
+    stageは失敗した処理段階（read: ファイルの読み込み、extract: テキスト抽出、parse: 解析、timeout: 制限時間超過、
+    crash: ワーカープロセスの異常終了、uncached: --only-cachedで抽出済みのテキストがない）。
+    line_numberはエラーが発生した銘柄の開始行の行番号（1始まり）、line_windowはwindow_start行目（1始まり）からの前後の行。
+    """
+    file_path: str
+    pdf_type: PdfType | None
+    stage: str
+    exception: str
+    message: str
+    line_number: int | None = None
+    window_start: int | None = None
+    line_window: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_exception(cls, file_path: str, e: BaseException) -> "FileFailure":
+        if isinstance(e, FileTimeoutError):
+            stage = "timeout"
+        elif isinstance(e, NotCachedError):
+            stage = "uncached"
+        elif isinstance(e, BrokenProcessPool):
+            stage = "crash"
+        elif type(e).__module__.startswith("pdfminer"):
+            stage = "extract"
+        elif isinstance(e, OSError):
+            stage = "read"
+        else:
+            stage = "parse"
+
+        failure = cls(file_path, None, stage, type(e).__name__, str(e))
+        if isinstance(e, ReportParseError):
+            failure.pdf_type = e.pdf_type
+            if e.line_index is not None and e.window_start is not None:
+                failure.line_number = e.line_index + 1
+                failure.window_start = e.window_start + 1
+                failure.line_window = e.line_window
+        return failure
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "file_path": self.file_path,
+            "pdf_type": self.pdf_type.name if self.pdf_type is not None else None,
+            "stage": self.stage,
+            "exception": self.exception,
+            "message": self.message,
+            "line_number": self.line_number,
+            "window_start": self.window_start,
+            "line_window": self.line_window,
+        }
+
+
+@dataclass
+class FileResult:
+    """1ファイル分の解析結果。
+
+    プロセスプールのワーカーから返却されるため、pickle可能なデータのみを保持する。
+    各行の先頭要素はファイルパス。解析対象外のPDFの場合、pdf_typeはNone。
+    前回の解析結果（マニフェスト）から作成した場合、metricsはNone。
+    解析に失敗した場合（--keep-going）は、failureに失敗の情報を保持し、行は空。
+    extracted_textは、テキストパックに保存する抽出したテキスト（.pdf.txtやテキストパックから読み込んだ場合はNone）。
+    extracted_text_truncatedは、extracted_textが「以下余白」のページまでで、以降のページの抽出を省略しているか。
+    japanese_stock_dividend_records・global_stock_dividend_recordsは、行を型変換したレコード
+    （列指向のファイル・SQLiteへ出力する場合のみ作成し、それ以外はNone）。
+    sha256は、PDFファイルの内容のSHA-256（マニフェスト・SQLiteへ出力する場合のみ求め、それ以外はNone）。
+    profileは、処理段階ごとのプロファイルの統計情報（--profileを指定しない場合はNone）。
+    """
+    file_path: str
+    pdf_type: PdfType | None
+    japanese_stock_dividend_rows: List[List[str]]
+    global_stock_dividend_rows: List[List[str]]
+    cache_events: List[CacheEvent]
+    metrics: FileMetrics | None = None
+    failure: FileFailure | None = None
+    extracted_text: str | None = None
+    extracted_text_truncated: bool = False
+    profile: Dict[str, Dict[Any, Any]] | None = None
+    japanese_stock_dividend_records: List[JapaneseStockDividendRecord] | None = None
+    global_stock_dividend_records: List[GlobalStockDividendRecord] | None = None
+    sha256: str | None = None
+
+    def convert_rows(self) -> None:
+        """行を型変換したレコードを作成する。変換できない項目がある場合はValueErrorを送出する。"""
+        self.japanese_stock_dividend_records = JapaneseStockDividendRecord.from_rows(self.japanese_stock_dividend_rows)
+        self.global_stock_dividend_records = GlobalStockDividendRecord.from_rows(self.global_stock_dividend_rows)
+
+
+def needs_records(args: "Arguments") -> bool:
+    """型変換したレコードを出力する（列指向のファイル・SQLiteへ出力する）か"""
+    return args.columnar_output is not None or args.sqlite is not None
+
+
+def needs_sha256(args: "Arguments") -> bool:
+    """PDFファイルの内容のSHA-256を出力する（マニフェスト・SQLiteへ出力する）か"""
+    return args.incremental or args.sqlite is not None
+
+
+def file_sha256(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, mode="rb") as f:
+        while chunk := f.read(1024 * 1024):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def mtime_or_none(file_path: str) -> int | None:
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class Manifest:
+    """解析済みファイルのマニフェスト（--incremental用）。
+
+    ファイルパスごとにサイズ、更新日時、内容のSHA-256、手修正用テキストファイル（.pdf.txt）の更新日時、
+    PDFタイプ、出力した行を保存する。
+    サイズと更新日時が一致する場合は前回の解析結果をそのまま利用する。
+    更新日時のみ異なる場合は内容のSHA-256で判定する。
+    .pdf.txtが追加・変更された場合は手修正されたとみなして再解析する。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+        if exists(path):
+            try:
+                with open(path, mode="r", encoding="utf-8") as f:
+                    self.entries = json.load(f)["entries"]
+            except (ValueError, KeyError) as e:
+                logger.warning(f"マニフェストの読み込みに失敗したため、すべてのファイルを解析します: {path}, {repr(e)}")
+                self.entries = {}
+
+    def lookup(self, file_path: str) -> FileResult | None:
+        """前回の解析結果を返却する。追加・変更されたファイルの場合はNoneを返却する。"""
+        entry = self.entries.get(file_path)
+        if entry is None:
+            return None
+
+        stat = os.stat(file_path)
+        if entry["size"] != stat.st_size or entry["sidecar_mtime"] != mtime_or_none(file_path + ".txt"):
+            return None
+
+        if entry["mtime"] != stat.st_mtime_ns:
+            # 更新日時のみ変わった場合（コピーなど）は内容で判定する
+            if entry["sha256"] != file_sha256(file_path):
+                return None
+            entry["mtime"] = stat.st_mtime_ns
+
+        pdf_type = PdfType[entry["pdf_type"]] if entry["pdf_type"] is not None else None
+        return FileResult(file_path, pdf_type, entry["japanese_stock_dividend_rows"], entry["global_stock_dividend_rows"], [],
+                          sha256=entry["sha256"])
+
+    def update(self, result: FileResult) -> None:
+        """解析結果を記録する。SHA-256はワーカーで求めたresult.sha256を利用し、ない場合のみファイルを読み込んで求める。"""
+        stat = os.stat(result.file_path)
+        self.entries[result.file_path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "sha256": result.sha256 if result.sha256 is not None else file_sha256(result.file_path),
+            "sidecar_mtime": mtime_or_none(result.file_path + ".txt"),
+            "pdf_type": result.pdf_type.name if result.pdf_type is not None else None,
+            "japanese_stock_dividend_rows": result.japanese_stock_dividend_rows,
+            "global_stock_dividend_rows": result.global_stock_dividend_rows,
+        }
+
+    def save(self) -> None:
+        # 削除されたファイルのエントリを除外。-iで対象外となったファイルのエントリは残す。
+        self.entries = {file_path: entry for file_path, entry in self.entries.items() if exists(file_path)}
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, mode="w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """パーセンタイル値（最近傍順位法）。valuesはソート済みであること。"""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(len(values) * p / 100), 1)
+    return values[rank - 1]
+
+
+class MetricsRecorder:
+    """ファイルごとの計測結果をJSON Lines形式で出力し、close()時に集計結果をログに出力する。"""
+
+    SLOWEST_FILE_COUNT: Final[int] = 5
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.metrics: List[FileMetrics] = []
+        self.file: TextIO = open(path, mode="w", encoding="utf-8")
+
+    def record(self, result: FileResult) -> None:
+        if result.metrics is None:
+            return
+        self.metrics.append(result.metrics)
+        line = {"pdf_type": result.pdf_type.name if result.pdf_type is not None else None, **result.metrics.to_dict()}
+        self.file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def summary(self) -> List[str]:
+        """処理段階ごとの合計・p50・p95と、処理時間が長いファイルの一覧"""
+        lines = [f"計測結果: ファイル数={len(self.metrics)}, "
+                 f"ページ数={sum(m.pages for m in self.metrics)}, 行数={sum(m.rows for m in self.metrics)}, "
+                 f"キャッシュヒット={sum(1 for m in self.metrics if m.cache_hit)}, "
+                 f"再抽出={sum(1 for m in self.metrics if m.fallback)}, スキップ={sum(1 for m in self.metrics if m.skipped)}"]
+        for stage in metrics_stages + ["total"]:
+            values = sorted(m.total_seconds if stage == "total" else m.seconds[stage] for m in self.metrics)
+            lines.append(f"  {stage:<8} 合計={sum(values):9.3f}s, p50={percentile(values, 50):8.3f}s, p95={percentile(values, 95):8.3f}s")
+
+        slowest = sorted(self.metrics, key=lambda m: m.total_seconds, reverse=True)[:self.SLOWEST_FILE_COUNT]
+        if slowest:
+            lines.append("  処理時間が長いファイル:")
+        for m in slowest:
+            stages = ", ".join(f"{stage}={m.seconds[stage]:.3f}" for stage in metrics_stages if m.seconds[stage] > 0)
+            lines.append(f"    {m.total_seconds:8.3f}s {m.file_path} ({stages})")
+        return lines
+
+    def close(self) -> None:
+        self.file.close()
+        for line in self.summary():
+            logger.info(line)
+
+
+class ProfileData:
+    """ワーカーから返却されたプロファイルの統計情報を、pstats.Statsに渡すための入れ物。"""
+
+    def __init__(self, stats: Dict[Any, Any]) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def profile_function_name(func: Tuple[str, int, str]) -> str:
+    """pstatsの関数のキー（ファイル名, 行番号, 関数名）を表示用の名前にする。"""
+    file_name, line, name = func
+    if file_name == "~":
+        # 組み込み関数
+        return name
+    return f"{name} ({os.path.basename(file_name)}:{line})"
+
+
+class ProfileReport:
+    """処理段階ごとのプロファイルの統計情報を集計し、close()時にファイルとログに出力する（--profile）。
+
+    - <ディレクトリ>/profile.pstats: すべての処理段階を集計した統計情報（python -m pstats、snakevizなどで参照）
+    - <ディレクトリ>/<処理段階>.pstats: 処理段階ごとの統計情報
+    - <ディレクトリ>/profile.collapsed: 折りたたみ形式のスタック（flamegraph.pl、speedscopeなどで参照）
+    - ログ: 処理段階ごとの自己時間が長い関数
+    """
+
+    TOP_FUNCTION_COUNT: Final[int] = 10
+    # 折りたたみ形式のスタックを作成する際の最大の深さ、省略する呼び出しの割合（処理段階の合計時間に対する割合）
+    COLLAPSED_MAX_DEPTH: Final[int] = 64
+    COLLAPSED_MIN_RATIO: Final[float] = 0.0005
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.stats: Dict[str, pstats.Stats] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, profile: Dict[str, Dict[Any, Any]]) -> None:
+        for stage, stats in profile.items():
+            if stage in self.stats:
+                self.stats[stage].add(cast(Any, ProfileData(stats)))
+            else:
+                self.stats[stage] = pstats.Stats(cast(Any, ProfileData(stats)))
+
+    def collapse(self, stage: str, stats: Dict[Any, Any]) -> Dict[str, float]:
+        """呼び出し元ごとの統計情報から、折りたたみ形式のスタックごとの自己時間（秒）を求める。
+
+        cProfileは呼び出し元と呼び出し先の組み合わせごとの時間のみ記録するため、呼び出し元から呼び出し先への累積時間の割合で
+        各スタックの時間を按分する（近似値）。再帰呼び出しと、割合の小さい呼び出しは省略する。
+        """
+        children: Dict[Any, List[Tuple[Any, float]]] = {}
+        for func, (_, _, _, _, callers) in stats.items():
+            for caller, (_, _, _, edge_seconds) in callers.items():
+                children.setdefault(caller, []).append((func, edge_seconds))
+        total_seconds = sum(tt for (_, _, tt, _, _) in stats.values())
+        min_seconds = total_seconds * self.COLLAPSED_MIN_RATIO
+        stacks: Dict[str, float] = {}
+
+        def walk(func: Any, frames: List[str], seconds: float, visiting: Set[Any]) -> None:
+            (_, _, tt, ct, _) = stats[func]
+            ratio = seconds / ct if ct > 0 else 0.0
+            key = ";".join(frames)
+            stacks[key] = stacks.get(key, 0.0) + tt * ratio
+            if len(frames) >= self.COLLAPSED_MAX_DEPTH:
+                return
+            for callee, edge_seconds in children.get(func, []):
+                callee_seconds = edge_seconds * ratio
+                if callee in visiting or callee_seconds < min_seconds:
+                    continue
+                visiting.add(callee)
+                walk(callee, frames + [profile_function_name(callee).replace(";", ":")], callee_seconds, visiting)
+                visiting.remove(callee)
+
+        # 処理段階を有効にした時点で実行中だった関数は呼び出し元が記録されないため、呼び出し元のない関数を起点とする
+        for func, (_, _, _, ct, callers) in stats.items():
+            if not callers:
+                walk(func, [stage, profile_function_name(func).replace(";", ":")], ct, {func})
+        return stacks
+
+    def summary(self) -> List[str]:
+        """処理段階ごとの合計時間と、自己時間が長い関数の一覧"""
+        lines = [f"プロファイル: {self.directory}"]
+        for stage in profile_stages:
+            if stage not in self.stats:
+                continue
+            stats: Dict[Any, Any] = getattr(self.stats[stage], "stats")
+            lines.append(f"  {stage:<8} 合計={sum(tt for (_, _, tt, _, _) in stats.values()):9.3f}s")
+            lines.append(f"    {'自己時間':>6} {'累積時間':>6} {'呼び出し':>6}  関数")
+            hottest = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:self.TOP_FUNCTION_COUNT]
+            for func, (_, nc, tt, ct, _) in hottest:
+                lines.append(f"    {tt:9.3f}s {ct:9.3f}s {nc:10}  {profile_function_name(func)}")
+        return lines
+
+    def close(self) -> None:
+        stage_paths: List[str] = []
+        with open(join(self.directory, "profile.collapsed"), mode="w", encoding="utf-8") as f:
+            for stage in profile_stages:
+                if stage not in self.stats:
+                    continue
+                stage_path = join(self.directory, f"{stage}.pstats")
+                self.stats[stage].dump_stats(stage_path)
+                stage_paths.append(stage_path)
+                # 折りたたみ形式の値は整数のため、マイクロ秒単位で出力する
+                for stack, seconds in self.collapse(stage, getattr(self.stats[stage], "stats")).items():
+                    if (microseconds := round(seconds * 1000 * 1000)) > 0:
+                        f.write(f"{stack} {microseconds}\n")
+        if stage_paths:
+            pstats.Stats(*stage_paths).dump_stats(join(self.directory, "profile.pstats"))
+        for line in self.summary():
+            logger.info(line)
+
+
+class FailureReport:
+    """解析に失敗したファイルをJSON Lines形式で出力し、close()時に件数をログに出力する（--keep-going用）。"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.failures: List[FileFailure] = []
+        self.file: TextIO = open(path, mode="w", encoding="utf-8")
+
+    def record(self, failure: FileFailure) -> None:
+        self.failures.append(failure)
+        self.file.write(json.dumps(failure.to_dict(), ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+        if not self.failures:
+            return
+        logger.warning(f"解析エラー: {len(self.failures)}ファイル（詳細: {self.path}）")
+        for failure in self.failures:
+            logger.warning(f"  {failure.file_path}: {failure.stage}, {failure.exception}: {failure.message}")
+
+
+@dataclass
+class Arguments:
+    input: str | None
+    input_dirs: List[str]
+    include: List[str]
+    exclude: List[str]
+    since: date | None
+    until: date | None
+    check_magic: bool
+    force_save_text: bool
+    jobs: int
+    cache_dir: str | None
+    cache_size: int
+    incremental: bool
+    extract_mode: str
+    roi_config: str | None
+    dump_layout: bool
+    metrics: str | None
+    profile: str | None
+    columnar_output: str | None
+    columnar_format: str
+    sqlite: str | None
+    watch: bool
+    keep_going: bool
+    timeout: float | None
+    only_cached: bool
+    text_pack: str | None
+    shard: Tuple[int, int] | None
+    command: str | None
+    shard_dirs: List[str]
+    socket: str
+    keep_text: bool
+
+
+def parse_arguments() -> Arguments:
+    parser = argparse.ArgumentParser(description="PDF解析ツール")
+    parser.add_argument("-i", "--input", type=str, default=None, help="解析対象のPDFファイルパス。未指定の場合は、対象ディレクトリを再帰的に解析")
+    parser.add_argument("--input-dir", type=str, action="append", default=None,
+                        help=f"解析対象のディレクトリ。複数指定可。デフォルトは{input_dir}")
+    parser.add_argument("--include", type=str, action="append", default=[],
+                        help="解析対象とするファイルのパターン（ファイル名または入力ディレクトリからの相対パス、例: '2024-*.pdf'）。複数指定可")
+    parser.add_argument("--exclude", type=str, action="append", default=[],
+                        help="解析対象外とするファイルのパターン（ファイル名または入力ディレクトリからの相対パス、例: 'old/*'）。複数指定可")
+    parser.add_argument("--since", type=date.fromisoformat, default=None,
+                        help="この日付（YYYY-MM-DD）以降のファイルのみ解析する。ファイル名の日付、ファイル名に日付がない場合は更新日時で判定")
+    parser.add_argument("--until", type=date.fromisoformat, default=None,
+                        help="この日付（YYYY-MM-DD）以前のファイルのみ解析する。ファイル名の日付、ファイル名に日付がない場合は更新日時で判定")
+    parser.add_argument("--check-magic", default=False, action="store_true",
+                        help="ファイルの先頭を読み込み、PDFファイル（%%PDF-）ではないファイルをスキップする")
+    parser.add_argument("-f", "--force-save-text", default=False, action="store_true", help="解析結果を強制的にテキストファイルに保存")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="並列で解析するプロセス数。0を指定した場合はCPU数。デフォルトは1（並列化しない）")
+    parser.add_argument("--cache-dir", type=str, default=cache_dir, help=f"PDFから抽出したテキストのキャッシュディレクトリ。デフォルトは{cache_dir}")
+    parser.add_argument("--cache-size", type=int, default=1024, help="キャッシュの最大サイズ（MB）。超過した場合は参照日時が古いものから削除する。デフォルトは1024")
+    parser.add_argument("--no-cache", default=False, action="store_true", help="PDFから抽出したテキストのキャッシュを利用しない")
+    parser.add_argument("--incremental", default=False, action="store_true",
+                        help=f"前回実行時から追加・変更されたファイルのみ解析し、それ以外は前回の解析結果（{output_dir}/{manifest_file_name}）を利用する")
+    parser.add_argument("--extract-mode", type=str, choices=extract_modes, default="full",
+                        help="テキストの抽出モード。fastはレイアウト解析の一部を省略して高速に抽出し、解析できなかった場合はfullで再抽出する。デフォルトはfull")
+    parser.add_argument("--roi-config", type=str, default=None,
+                        help="ROI設定ファイル。指定した場合、設定のあるPDFタイプはページ全体ではなく設定した領域の文字のみを抽出する")
+    parser.add_argument("--dump-layout", default=False, action="store_true",
+                        help="ROI設定ファイル作成用に、解析対象のPDFの各行の座標と文字列を出力して終了する")
+    parser.add_argument("--metrics", type=str, default=None,
+                        help="ファイルごとの処理段階別の処理時間などをJSON Lines形式で出力するファイル。指定した場合、実行終了時に集計結果をログに出力する")
+    parser.add_argument("--profile", type=str, default=None,
+                        help="処理段階（抽出、PDFタイプ判定、解析、CSV出力）ごとにプロファイルし、"
+                             "集計した統計情報（pstats）と折りたたみ形式のスタックを出力するディレクトリ")
+    parser.add_argument("--columnar-output", type=str, default=None,
+                        help="CSVに加えて、支払日の年でパーティション分割した列指向のファイルを出力するディレクトリ。pyarrowが必要")
+    parser.add_argument("--columnar-format", type=str, choices=list(columnar_formats), default="parquet",
+                        help="列指向のファイルの形式（parquet: Parquet、arrow: Arrow IPC）。デフォルトはparquet")
+    parser.add_argument("--sqlite", type=str, default=None,
+                        help="CSVに加えて、解析結果を出力（更新）するSQLiteデータベースファイル。再解析したファイルの行は置き換える")
+    parser.add_argument("--watch", default=False, action="store_true",
+                        help="解析後も終了せずに解析対象のディレクトリを監視し、追加されたPDFファイルを解析して出力に追記する。Ctrl+Cで終了")
+    parser.add_argument("--keep-going", default=False, action="store_true",
+                        help=f"解析エラーのファイルがあっても中断せずに残りのファイルを解析し、失敗したファイルを{output_dir}/{failure_report_name}に出力する")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="1ファイルの処理の制限時間（秒）。超過した場合は解析エラーとする。デフォルトは制限なし")
+    parser.add_argument("--only-cached", default=False, action="store_true",
+                        help="PDFからテキストを抽出せず、.pdf.txt・テキストパック・抽出キャッシュのみで解析する。いずれもないファイルはスキップする")
+    parser.add_argument("--text-pack", type=str, default=None,
+                        help="抽出したテキストを.pdf.txtの代わりに保存・読み込みするテキストパックのファイル。.pdf.txtがある場合はそちらを優先する")
+    parser.add_argument("--shard", type=str, default=None,
+                        help="i/Nの形式で指定（例: 1/4）。解析対象のファイルを相対パスのハッシュでN個に分割し、i番目のみ解析してシャードごとのCSVに出力する")
+    subparsers = parser.add_subparsers(dest="command", metavar="{merge,serve,export-text,import-text}")
+    merge_parser = subparsers.add_parser("merge", help="--shardで分割して出力したCSVを結合する")
+    merge_parser.add_argument("shard_dirs", type=str, nargs="*", default=[output_dir],
+                              help=f"シャードごとのCSVがあるディレクトリ。複数指定可。デフォルトは{output_dir}。"
+                                   "シャードを実行した入力ディレクトリを同じ順序で--input-dirに指定する"
+                                   "（マシンごとにパスが異なる場合は:で区切って指定）")
+    serve_parser = subparsers.add_parser("serve", help="解析サーバーを起動し、Unixソケットで受け付けたPDFを解析して結果をJSONで返却する")
+    serve_parser.add_argument("--socket", type=str, default=server_socket_path,
+                              help=f"待ち受けるUnixソケットのパス。デフォルトは{server_socket_path}")
+    subparsers.add_parser("export-text", help="テキストパック（--text-pack）のテキストを手修正用に.pdf.txtへ出力する")
+    import_parser = subparsers.add_parser("import-text", help=".pdf.txtをテキストパック（--text-pack）に取り込み、.pdf.txtを削除する")
+    import_parser.add_argument("--keep-text", default=False, action="store_true", help="取り込んだ.pdf.txtを削除しない")
+    args = parser.parse_args()
+
+    shard: Tuple[int, int] | None = None
+    if args.shard is not None:
+        m = re.fullmatch(r"(\d+)/(\d+)", args.shard)
+        if m is None or not 1 <= int(m.group(1)) <= int(m.group(2)):
+            parser.error("--shardはi/Nの形式（1≦i≦N）で指定してください。")
+        shard = (int(m.group(1)), int(m.group(2)))
+    if args.jobs < 0:
+        parser.error("--jobsには0以上の値を指定してください。")
+    if args.timeout is not None and args.timeout <= 0:
+        parser.error("--timeoutには0より大きい値を指定してください。")
+    if args.timeout is not None and not hasattr(signal, "setitimer"):
+        parser.error("--timeoutはこの環境では利用できません。")
+    if args.command in ("export-text", "import-text") and args.text_pack is None:
+        parser.error(f"{args.command}を指定する場合は、--text-packを指定してください。")
+    if args.command == "serve" and not hasattr(socket, "AF_UNIX"):
+        parser.error("serveはこの環境では利用できません。（Unixソケットが必要）")
+    if args.columnar_output is not None and importlib.util.find_spec("pyarrow") is None:
+        parser.error("--columnar-outputを指定する場合は、pyarrowをインストールしてください。（pip install pyarrow）")
+
+    named_args = {
+        "input": args.input,
+        "input_dirs": args.input_dir if args.input_dir else [input_dir],
+        "include": args.include,
+        "exclude": args.exclude,
+        "since": args.since,
+        "until": args.until,
+        "check_magic": args.check_magic,
+        "force_save_text": args.force_save_text,
+        "jobs": args.jobs if args.jobs > 0 else (os.cpu_count() or 1),
+        "cache_dir": None if args.no_cache else args.cache_dir,
+        "cache_size": args.cache_size * 1024 * 1024,
+        "incremental": args.incremental,
+        "extract_mode": args.extract_mode,
+        "roi_config": args.roi_config,
+        "dump_layout": args.dump_layout,
+        "metrics": args.metrics,
+        "profile": args.profile,
+        "columnar_output": args.columnar_output,
+        "columnar_format": args.columnar_format,
+        "sqlite": args.sqlite,
+        "watch": args.watch,
+        "keep_going": args.keep_going,
+        "timeout": args.timeout,
+        "only_cached": args.only_cached,
+        "text_pack": args.text_pack,
+        "shard": shard,
+        "command": args.command,
+        "shard_dirs": args.shard_dirs if args.command == "merge" else [],
+        "socket": args.socket if args.command == "serve" else server_socket_path,
+        "keep_text": args.keep_text if args.command == "import-text" else False
+    }
+
+    return Arguments(**named_args)
+
+
+class DirectoryListingCache:
+    """ディレクトリの一覧のキャッシュ（<キャッシュディレクトリ>/listing.json）。
+
+    ディレクトリごとに更新日時と、拡張子がPDFのファイル名・サブディレクトリ名の一覧を保存する。
+    ディレクトリの更新日時はエントリの追加・削除・名前変更で更新されるため、更新日時が一致する場合は一覧を読み込まない。
+    更新日時が直近（SETTLE_NSナノ秒以内）のディレクトリは、同じ更新日時のまま変更される可能性があるためキャッシュしない。
+    directoryがNoneの場合はキャッシュを利用しない。
+    """
+    FILE_NAME: Final[str] = "listing.json"
+    SETTLE_NS: Final[int] = 2 * 1000 * 1000 * 1000
+
+    def __init__(self, directory: str | None) -> None:
+        self.path = join(directory, self.FILE_NAME) if directory is not None else None
+        # ディレクトリパス→(更新日時, 拡張子がPDFのファイル名, サブディレクトリ名)
+        self.entries: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        self.visited: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+        if self.path is not None and exists(self.path):
+            try:
+                with open(self.path, mode="r", encoding="utf-8") as f:
+                    self.entries = {dir_path: (mtime, files, dirs)
+                                    for dir_path, (mtime, files, dirs) in json.load(f)["directories"].items()}
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"ディレクトリの一覧のキャッシュの読み込みに失敗しました: {self.path}, {repr(e)}")
+                self.entries = {}
+
+    def list_dir(self, dir_path: str) -> Tuple[List[str], List[str]]:
+        """ディレクトリ内の拡張子がPDFのファイル名とサブディレクトリ名を返却する。
+
+        os.walkと同様に、シンボリックリンクのディレクトリは辿らない（ファイルにも含めない）。
+        """
+        mtime = os.stat(dir_path).st_mtime_ns
+        entry = self.entries.get(dir_path)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            self.visited[dir_path] = entry
+            return entry[1], entry[2]
+
+        self.misses += 1
+        files: List[str] = []
+        dirs: List[str] = []
+        with os.scandir(dir_path) as it:
+            for dir_entry in it:
+                try:
+                    is_dir = dir_entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    if has_pdf_extension(dir_entry.name):
+                        files.append(dir_entry.name)
+                elif not dir_entry.is_symlink():
+                    dirs.append(dir_entry.name)
+        if time.time_ns() - mtime >= self.SETTLE_NS:
+            self.visited[dir_path] = (mtime, files, dirs)
+        return files, dirs
+
+    def save(self) -> None:
+        """今回参照したディレクトリの一覧を保存する。"""
+        if self.path is None:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, mode="w", encoding="utf-8") as f:
+            json.dump({"directories": self.visited}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def find_pdf_files(args: Arguments, listing: DirectoryListingCache | None = None) -> List[str]:
+    """解析対象のPDFファイルを検索する。
+
+    args.input_dirsの各ディレクトリを再帰的に検索し、is_target_file()の条件に一致するファイルを返却する。
+    ディレクトリの一覧はos.scandirで取得し（listingを指定した場合はキャッシュを利用）、
+    ファイルごとのstatや読み込みは、日付の条件や--check-magicを指定した場合に、それ以外の条件に一致したファイルのみ行う。
+    並列実行時も逐次実行時と同じ順序でCSVに出力するため、(入力ディレクトリの順序, 入力ディレクトリからの相対パス)で
+    ソートして返却する（mergeサブコマンドの結合と同じ順序。input_sort_key()を参照）。
+
+    Returns:
+        List[str]: 解析対象のPDFファイルパス（ソート済み）
+    """
+    if listing is None:
+        listing = DirectoryListingCache(None)
+
+    # ファイルパスごとのソートのキー。複数の入力ディレクトリに含まれる場合は、先に指定したディレクトリのキーとする。
+    pdf_files: Dict[str, Tuple[int, str]] = {}
+    for root_index, input_root in enumerate(args.input_dirs):
+        if not os.path.isdir(input_root):
+            logger.warning(f"入力ディレクトリが存在しません: {input_root}")
+            continue
+        dir_paths = [input_root]
+        while dir_paths:
+            dir_path = dir_paths.pop()
+            try:
+                files, dirs = listing.list_dir(dir_path)
+            except OSError as e:
+                logger.warning(f"ディレクトリの一覧を取得できません: {dir_path}, {repr(e)}")
+                continue
+            dir_paths.extend(join(dir_path, dir_name) for dir_name in dirs)
+            for file_name in files:
+                file_path = join(dir_path, file_name)
+                if is_target_file(file_path, args, input_root) and file_path not in pdf_files:
+                    pdf_files[file_path] = (root_index, relative_input_path(file_path, args, input_root))
+
+    return sorted(pdf_files, key=lambda file_path: pdf_files[file_path])
+
+
+def has_pdf_extension(file_name: str) -> bool:
+    """拡張子がpdfかどうか（.pdf.txtは含まない）。"""
+    _, ext = os.path.splitext(file_name)
+    return ext.upper().endswith("PDF")
+
+
+# ファイル名に含まれる日付（YYYY-MM-DD、YYYY_MM_DD、YYYYMMDDなど）
+re_file_name_date = re.compile(r"(?<!\d)(\d{4})[-_.]?(\d{2})[-_.]?(\d{2})(?!\d)")
+
+
+def file_date(file_path: str) -> date:
+    """ファイルの日付。ファイル名に日付が含まれる場合はその日付、含まれない場合は更新日時の日付。"""
+    for m in re_file_name_date.finditer(os.path.basename(file_path)):
+        try:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            continue
+    return datetime.fromtimestamp(os.stat(file_path).st_mtime).date()
+
+
+def has_pdf_signature(file_path: str) -> bool:
+    """ファイルの先頭1024バイト以内に%PDF-があるかどうか。"""
+    try:
+        with open(file_path, mode="rb") as f:
+            return b"%PDF-" in f.read(1024)
+    except OSError:
+        return False
+
+
+def is_target_file(file_path: str, args: Arguments, input_root: str | None = None) -> bool:
+    """解析対象のPDFファイルかどうか。
+
+    拡張子、-i、--include・--exclude、--since・--until、--shard、--check-magicの順に判定する。
+    --include・--excludeのパターンは、ファイル名または入力ディレクトリ（input_root）からの相対パス（区切り文字は/）と比較する。
+    input_rootを省略した場合は、args.input_dirsからfile_pathを含むディレクトリを探す。
+    --shardを指定した場合は、割り当てられたシャードのファイルのみ対象とする。
+    """
+    file_name = os.path.basename(file_path)
+
+    # 拡張子がpdfではない場合スキップ
+    if not has_pdf_extension(file_name):
+        return False
+
+    if args.input and args.input not in file_path:
+        logger.debug(f"ファイルスキップ： {file_path}")
+        return False
+
+    if args.include or args.exclude:
+        names = (file_name, relative_input_path(file_path, args, input_root))
+        if args.include and not any(fnmatch(name, pattern) for pattern in args.include for name in names):
+            logger.debug(f"ファイルスキップ（--include）： {file_path}")
+            return False
+        if any(fnmatch(name, pattern) for pattern in args.exclude for name in names):
+            logger.debug(f"ファイルスキップ（--exclude）： {file_path}")
+            return False
+
+    if args.since is not None or args.until is not None:
+        try:
+            target_date = file_date(file_path)
+        except OSError:
+            return False
+        if (args.since is not None and target_date < args.since) or (args.until is not None and target_date > args.until):
+            logger.debug(f"ファイルスキップ（日付: {target_date}）： {file_path}")
+            return False
+
+    if args.shard is not None and shard_index(relative_input_path(file_path, args, input_root), args.shard[1]) != args.shard[0]:
+        return False
+
+    if args.check_magic and not has_pdf_signature(file_path):
+        logger.warning(f"PDFファイルではないためスキップ： {file_path}")
+        return False
+
+    return True
+
+
+def relative_input_path(file_path: str, args: Arguments, input_root: str | None = None) -> str:
+    """入力ディレクトリ（input_root）からの相対パス（区切り文字は/）。
+
+    input_rootを省略した場合は、args.input_dirsからfile_pathを含むディレクトリを探す。見つからない場合はfile_pathを返却する。
+    """
+    if input_root is None:
+        input_root = next((root for root in args.input_dirs if file_path.startswith(join(root, ""))), None)
+    if input_root is None:
+        return file_path
+    return os.path.relpath(file_path, input_root).replace(os.sep, "/")
+
+
+def input_sort_key(file_path: str, input_roots: List[List[str]]) -> Tuple[int, str] | None:
+    """CSVの行の順序のキー（入力ディレクトリの順序, 入力ディレクトリからの相対パス）。
+
+    input_rootsは入力ディレクトリごとのパスのリスト（マシンごとにパスが異なる場合は、同じ入力ディレクトリとして複数のパスを指定）。
+    先に指定した入力ディレクトリから探し、いずれにも含まれない場合はNoneを返却する。
+    """
+    for root_index, paths in enumerate(input_roots):
+        for input_root in paths:
+            if file_path.startswith(join(input_root, "")):
+                return (root_index, os.path.relpath(file_path, input_root).replace(os.sep, "/"))
+    return None
+
+
+def shard_index(relative_path: str, shard_count: int) -> int:
+    """ファイルを割り当てるシャード番号（1始まり）。
+
+    入力ディレクトリからの相対パスのSHA-256で決めるため、マシンごとに入力ディレクトリのパスが異なっても同じシャードになる。
+    """
+    digest = hashlib.sha256(relative_path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count + 1
+
+
+def shard_file_name(file_name: str, shard: Tuple[int, int] | None) -> str:
+    """--shardを指定した場合の出力ファイル名（例: japanese_stock_dividend.shard-1-of-4.csv）。"""
+    if shard is None:
+        return file_name
+    stem, ext = os.path.splitext(file_name)
+    return f"{stem}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+
+def parse_pdf_text(file_path: str, source: PdfText, metrics: FileMetrics | None = None,
+                   profiler: StageProfiler | None = None) -> Tuple[PdfType, List[List[str]], List[List[str]]]:
+    """PDFタイプを判定して解析する。
+
+    metricsを指定した場合は、PDFタイプ判定と解析の処理時間を記録する。
+    解析中に行われたページの抽出時間は、解析の処理時間には含めない（source.extract_secondsに記録される）。
+    profilerを指定した場合は、PDFタイプ判定と解析をそれぞれの処理段階としてプロファイルする。
+
+    Returns:
+        Tuple[PDFタイプ, 国内株式の行, 外国株式の行]
+    """
+    japanese_stock_dividend_rows: List[List[str]] = []
+    global_stock_dividend_rows: List[List[str]] = []
+
+    first_page = source.first_page()
+    start = time.perf_counter()
+    with profile_stage(profiler, "classify"):
+        pdf_type = judge_pdf_type(first_page)
+    classify_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    extract_seconds = source.extract_seconds
+    if pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT \
+            or pdf_type == PdfType.JAPANESE_STOCK_DIVIDEND_REPORT_VER_EDITED:
+        logger.debug(f"PDFタイプ： {pdf_type}")
+        # 国内株式はページ単位で抽出しながら解析する
+        with profile_stage(profiler, "parse"):
+            for data in parse_japanese_stock_dividend_report(source.pages(), pdf_type, source.document_page_count):
+                data.insert(0, file_path)
+                japanese_stock_dividend_rows.append(data)
+    else:
+        # 外国株式のフォーマットの判定は全ページのテキストで行う
+        text = source.read()
+        extract_seconds = source.extract_seconds
+        start = time.perf_counter()
+        with profile_stage(profiler, "classify"):
+            pdf_type = judge_pdf_type(text)
+        classify_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        logger.debug(f"PDFタイプ： {pdf_type}")
+        with profile_stage(profiler, "parse"):
+            for data in parse_global_stock_dividend_report(text, pdf_type):
+                data.insert(0, file_path)
+                global_stock_dividend_rows.append(data)
+
+    if metrics is not None:
+        metrics.add("classify", classify_seconds)
+        metrics.add("parse", time.perf_counter() - start - (source.extract_seconds - extract_seconds))
+
+    return (pdf_type, japanese_stock_dividend_rows, global_stock_dividend_rows)
+
+
+def process_file(file_path: str, args: Arguments, cache: ExtractCache | None = None,
+                 extractor: TextExtractor | None = None, data: bytes | None = None, sidecar: bool = True,
+                 text_pack: TextPack | None = None) -> FileResult:
+    """1ファイルを解析する。
+
+    テキスト抽出、PDFタイプ判定、解析までを行う。プロセスプールのワーカーからも呼び出される。
+    args.profileを指定した場合は、処理段階ごとにプロファイルし、統計情報をFileResult.profileで返却する。
+
+    Args:
+        file_path: 解析対象のPDFファイルパス
+        args: 引数
+        cache: 抽出キャッシュ。Noneの場合はキャッシュを利用しない。
+        extractor: テキストの抽出方法。Noneの場合はデフォルトの抽出方法。
+        data: 読み込み済みのPDFファイルの内容。Noneの場合はファイルから読み込む。
+        sidecar: Falseの場合は、.pdf.txtとテキストパックの読み込み・保存を行わない。
+        text_pack: テキストパック。指定した場合は、抽出したテキストをFileResult.extracted_textで返却する。
+
+    Returns:
+        FileResult: 解析結果
+    """
+    logger.info(f"解析開始: {file_path}")
+    start = time.perf_counter()
+    metrics = FileMetrics(file_path)
+    profiler = StageProfiler() if args.profile is not None else None
+
+    # PDFをテキストに変換。
+    # file_path + ".txt"のファイルが存在する場合は、そちらを読み込む。
+    # 読み込みに失敗した場合は、file_path + ".txt"にテキストを出力するため、手修正して再度実行する。
+    try:
+        with profile_stage(profiler, "extract"):
+            source = read_rdf(file_path, cache, extractor, data, sidecar, args.only_cached, text_pack)
+    except UnsupportedPdfError:
+        logger.warning(f"解析対象外のPDFのためスキップ: {file_path}")
+        metrics.skipped = True
+        metrics.total_seconds = time.perf_counter() - start
+        return FileResult(file_path, None, [], [], [], metrics,
+                          profile=profiler.collect() if profiler is not None else None)
+    except NotCachedError as e:
+        # 出力・マニフェストへの記録は行わず、抽出が必要なファイルとして返却する
+        logger.warning(f"抽出済みのテキストがないためスキップ: {file_path}")
+        cache_events = cache.pop_events() if cache is not None else []
+        return FileResult(file_path, None, [], [], cache_events, failure=FileFailure.from_exception(file_path, e))
+
+    if cache is not None and source.origin not in ("sidecar", "pack"):
+        metrics.cache_hit = source.origin == "cache"
+    source.profiler = profiler
+
+    save_text = False
+    timed_out = False
+    parsed = False
+    extracted_text: str | None = None
+    try:
+        try:
+            (pdf_type, japanese_stock_dividend_rows, global_stock_dividend_rows) = parse_pdf_text(
+                file_path, source, metrics, profiler)
+        except FileTimeoutError:
+            # 制限時間を超えた場合は再抽出しない（制限時間の通知は1回のみのため、再抽出は制限時間なしで実行されてしまう）
+            raise
+        except Exception as e:
+            fallback = source.extractor.fallback if source.extractor is not None else None
+            if fallback is None:
+                raise e
+
+            # 高速に抽出したテキストを解析できなかった場合は、通常の抽出方法で再抽出して解析する
+            logger.warning(f"抽出したテキストを解析できなかったため、再抽出して解析: {file_path}, {repr(e)}")
+            metrics.fallback = True
+            metrics.record_source(source)
+            source.close()
+            if data is None:
+                with open(file_path, mode="rb") as f:
+                    data = f.read()
+            with profile_stage(profiler, "extract"):
+                source = fallback.open(file_path, data, source.cache_key)
+            source.profiler = profiler
+            (pdf_type, japanese_stock_dividend_rows, global_stock_dividend_rows) = parse_pdf_text(
+                file_path, source, metrics, profiler)
+
+        # 列指向のファイル・SQLiteへ出力する場合は、解析時に1回だけ型変換する（変換できない場合はこのファイルの解析エラー）
+        japanese_stock_dividend_records: List[JapaneseStockDividendRecord] | None = None
+        global_stock_dividend_records: List[GlobalStockDividendRecord] | None = None
+        if needs_records(args):
+            japanese_stock_dividend_records = JapaneseStockDividendRecord.from_rows(japanese_stock_dividend_rows)
+            global_stock_dividend_records = GlobalStockDividendRecord.from_rows(global_stock_dividend_rows)
+
+        # マニフェスト・SQLiteへ出力する場合は、読み込み済みのPDFファイルの内容からSHA-256を求める（出力のスレッドで読み込まない）
+        sha256: str | None = None
+        if needs_sha256(args):
+            pdf_data = data if data is not None else source.data
+            sha256 = hashlib.sha256(pdf_data).hexdigest() if pdf_data is not None else file_sha256(file_path)
+
+        parsed = True
+        if sidecar and text_pack is not None and source.origin not in ("sidecar", "pack"):
+            # 解析に不要なページは抽出せず、抽出済みのテキストを「以下余白」で抽出を終了したかとあわせて保存する
+            extracted_text = source.extracted_text()
+
+        if args.force_save_text:
+            save_text = sidecar
+    except Exception as e:
+        logger.error(f"解析エラー: {file_path}")
+        # 制限時間を超えた場合は、残りのページを抽出しない（抽出途中のテキストはキャッシュしない）
+        timed_out = isinstance(e, FileTimeoutError)
+        save_text = sidecar and not timed_out
+        raise e
+    finally:
+        if save_text and not exists(file_path + ".txt"):
+            text = source.read()
+            save_start = time.perf_counter()
+            with open(file_path + ".txt", mode="w", encoding="utf-8") as f:
+                f.write(text)
+            metrics.add("save", time.perf_counter() - save_start)
+
+        if cache is not None and source.cache_key is not None and not timed_out:
+            # 解析できた場合は、解析に不要なページは抽出せず、抽出済みのテキストを「以下余白」で抽出を終了したかとあわせて保存する。
+            # 解析エラーの場合は、再実行時にページ数を確認できるよう、テキスト全体を保存する
+            text = source.extracted_text() if parsed else source.read()
+            save_start = time.perf_counter()
+            cache.put(source.cache_key, text, truncated=not source.complete)
+            metrics.add("save", time.perf_counter() - save_start)
+
+        if not source.complete:
+            logger.debug(f"解析に不要な残りのページの抽出を省略: {file_path}")
+        source.close()
+
+    cache_events = cache.pop_events() if cache is not None else []
+
+    metrics.record_source(source)
+    metrics.rows = len(japanese_stock_dividend_rows) + len(global_stock_dividend_rows)
+    metrics.total_seconds = time.perf_counter() - start
+
+    logger.info(f"解析終了: {file_path}")
+
+    return FileResult(file_path, pdf_type, japanese_stock_dividend_rows, global_stock_dividend_rows, cache_events, metrics,
+                      extracted_text=extracted_text, extracted_text_truncated=source.truncated or not source.complete,
+                      profile=profiler.collect() if profiler is not None else None,
+                      japanese_stock_dividend_records=japanese_stock_dividend_records,
+                      global_stock_dividend_records=global_stock_dividend_records, sha256=sha256)
+
+
+def process_file_with_limits(file_path: str, args: Arguments, cache: ExtractCache | None = None,
+                             extractor: TextExtractor | None = None, data: bytes | None = None,
+                             sidecar: bool = True, text_pack: TextPack | None = None) -> FileResult:
+    """制限時間（args.timeout）を設定してprocess_file()を実行する。
+
+    制限時間はSIGALRMで通知するため、プロセスプールのワーカー（メインスレッド）で呼び出す。
+    args.keep_goingがTrueの場合は、解析エラーを送出せずにFileResult.failureとして返却する。
+    """
+    def timeout(signum: int, frame: Any) -> None:
+        raise FileTimeoutError(f"処理時間が制限時間（{args.timeout}秒）を超えました")
+
+    if args.timeout is not None:
+        signal.signal(signal.SIGALRM, timeout)
+        signal.setitimer(signal.ITIMER_REAL, args.timeout)
+    try:
+        return process_file(file_path, args, cache, extractor, data, sidecar, text_pack)
+    except Exception as e:
+        if not args.keep_going:
+            raise
+        failure = FileFailure.from_exception(file_path, e)
+        logger.error(f"解析エラーのためスキップ: {file_path}, {failure.stage}, {repr(e)}")
+        cache_events = cache.pop_events() if cache is not None else []
+        return FileResult(file_path, failure.pdf_type, [], [], cache_events, failure=failure)
+    finally:
+        if args.timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def read_pdf_data(file_path: str, text_pack: TextPack | None = None) -> bytes | None:
+    """PDFファイルの内容を読み込む。.pdf.txtやテキストパックのテキストがある場合はPDFファイルを利用しないため、Noneを返却する。"""
+    if exists(file_path + ".txt") or (text_pack is not None and text_pack.lookup(file_path) is not None):
+        return None
+    with open(file_path, mode="rb") as f:
+        return f.read()
+
+
+async def run_pipeline(pdf_files: List[str], retained: Dict[str, FileResult], args: Arguments, writer: "ResultWriter",
+                       cache: ExtractCache | None = None, extractor: TextExtractor | None = None,
+                       text_pack: TextPack | None = None) -> None:
+    """PDFファイルの読み込み、解析、出力をそれぞれ非同期の処理段階として並行に実行する。
+
+    - 読み込み: PDFファイルをスレッドで読み込み、読み込みキューへ追加する。
+    - 解析: 読み込んだファイルをexecutor（args.jobsが2以上、または--keep-going・--timeout・--profileを指定した場合はプロセスプール、
+      それ以外はスレッド）で解析し、解析結果（Future）を出力キューへ追加する。
+    - 出力: 解析結果をpdf_filesの順序で待ち、スレッドで出力する。
+    キューの最大長はargs.jobsの2倍で、後段が詰まると前段は待機するため、読み込み済み・解析中のファイルの数は一定以下となる。
+    出力はpdf_filesの順序で行うため、逐次実行時と同一になる。
+    args.keep_goingがTrueの場合、ワーカープロセスが異常終了したファイルは単独のプロセスで再実行し、
+    再度異常終了した場合は解析エラー（crash）とする。
+
+    Args:
+        pdf_files: 解析対象のPDFファイルパス（ソート済み）
+        retained: 前回の解析結果を利用するファイルの解析結果
+        writer: 解析結果の出力先
+    """
+    loop = asyncio.get_running_loop()
+    executor: Executor
+    queue_size = args.jobs * 2
+    # ファイルパス、PDFファイルの内容、読み込み時間
+    read_queue: asyncio.Queue[Tuple[str, bytes | None, float] | None] = asyncio.Queue(queue_size)
+    # ファイルパス、PDFファイルの内容、解析結果、読み込み時間
+    result_queue: asyncio.Queue[Tuple[str, bytes | None, asyncio.Future[FileResult], float] | None] = asyncio.Queue(queue_size)
+
+    def create_executor() -> Executor:
+        # --profileを指定した場合は、メインプロセスの他のスレッドの処理を計測しないよう、プロセスプールで解析する
+        if args.jobs > 1 or args.keep_going or args.timeout is not None or args.profile is not None:
+            return ProcessPoolExecutor(max_workers=args.jobs, initializer=setup_logging)
+        return ThreadPoolExecutor(max_workers=1)
+
+    def submit(file_path: str, data: bytes | None) -> asyncio.Future[FileResult]:
+        nonlocal executor
+        try:
+            return loop.run_in_executor(executor, process_file_with_limits, file_path, args, cache, extractor, data, True,
+                                        text_pack)
+        except BrokenProcessPool:
+            if not args.keep_going:
+                raise
+            # ワーカープロセスが異常終了した場合は、プロセスプールを作り直す
+            logger.warning("ワーカープロセスが異常終了したため、プロセスプールを再作成します")
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = create_executor()
+            return loop.run_in_executor(executor, process_file_with_limits, file_path, args, cache, extractor, data, True,
+                                        text_pack)
+
+    async def process_isolated(file_path: str, data: bytes | None) -> FileResult:
+        """ワーカープロセスが異常終了した場合に、単独のプロセスで再実行する。"""
+        logger.warning(f"ワーカープロセスが異常終了したため、単独のプロセスで再実行: {file_path}")
+        isolated_executor = ProcessPoolExecutor(max_workers=1, initializer=setup_logging)
+        try:
+            return await loop.run_in_executor(isolated_executor, process_file_with_limits, file_path, args, cache, extractor,
+                                              data, True, text_pack)
+        except BrokenProcessPool as e:
+            failure = FileFailure.from_exception(file_path, e)
+            logger.error(f"解析エラーのためスキップ: {file_path}, {failure.stage}, {repr(e)}")
+            return FileResult(file_path, None, [], [], [], failure=failure)
+        finally:
+            isolated_executor.shutdown(wait=True)
+
+    async def read_files() -> None:
+        for file_path in pdf_files:
+            start = time.perf_counter()
+            data = None if file_path in retained else await asyncio.to_thread(read_pdf_data, file_path, text_pack)
+            await read_queue.put((file_path, data, time.perf_counter() - start))
+        await read_queue.put(None)
+
+    async def process_files() -> None:
+        while (item := await read_queue.get()) is not None:
+            file_path, data, read_seconds = item
+            if file_path in retained:
+                future: asyncio.Future[FileResult] = loop.create_future()
+                future.set_result(retained[file_path])
+            else:
+                future = submit(file_path, data)
+            await result_queue.put((file_path, data, future, read_seconds))
+        await result_queue.put(None)
+
+    async def write_results() -> None:
+        while (item := await result_queue.get()) is not None:
+            file_path, data, future, read_seconds = item
+            try:
+                result = await future
+            except BrokenProcessPool:
+                if not args.keep_going:
+                    raise
+                result = await process_isolated(file_path, data)
+            if result.metrics is not None:
+                result.metrics.add("read", read_seconds)
+                result.metrics.total_seconds += read_seconds
+            await asyncio.to_thread(writer.write, result, result.file_path in retained)
+
+    if args.jobs > 1:
+        logger.info(f"並列解析: プロセス数={args.jobs}")
+    executor = create_executor()
+
+    tasks = [asyncio.create_task(read_files()), asyncio.create_task(process_files()), asyncio.create_task(write_results())]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # 解析エラー時は未実行のファイルをキャンセルして終了
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    else:
+        executor.shutdown(wait=True)
+
+
+class ResultWriter:
+    """解析結果を出力先（CSV、列指向のファイル、SQLite）へ出力し、マニフェスト・キャッシュのインデックス・計測結果に記録する。
+
+    テキストパックを指定した場合は、抽出したテキストをテキストパックに追記する（保存は呼び出し元で行う）。
+    profile_reportを指定した場合は、出力をcsvの処理段階としてプロファイルし、withブロックの終了時に
+    ワーカーから返却された統計情報とあわせて集計する。
+
+    出力先はstackに登録し、withブロックの終了時にコミットする。
+    appendがTrueの場合は、既存の出力に追記する（--watch用）。
+    """
+
+    def __init__(self, stack: ExitStack, args: Arguments, manifest: Manifest | None = None,
+                 cache_index: ExtractCacheIndex | None = None, metrics_recorder: MetricsRecorder | None = None,
+                 failure_report: FailureReport | None = None, text_pack: TextPack | None = None,
+                 append: bool = False, profile_report: ProfileReport | None = None) -> None:
+        self.manifest = manifest
+        self.cache_index = cache_index
+        self.metrics_recorder = metrics_recorder
+        self.failure_report = failure_report
+        self.text_pack = text_pack
+        self.profile_report = profile_report
+        self.profiler: StageProfiler | None = None
+        if profile_report is not None:
+            profiler = self.profiler = StageProfiler()
+            stack.callback(lambda: profile_report.record(profiler.collect()))
+        # 抽出済みのテキストがないためスキップしたファイル（--only-cached）
+        self.uncached_files: List[str] = []
+
+        # --shardを指定した場合は、シャードごとのファイル名で出力する
+        japanese_csv_name = shard_file_name(japanese_stock_dividend_csv_name, args.shard)
+        global_csv_name = shard_file_name(global_stock_dividend_csv_name, args.shard)
+        self.japanese_stock_dividend_sink = stack.enter_context(CsvSink(
+            join(output_dir, japanese_csv_name), japanese_stock_dividend_header, append=append))
+        self.global_stock_dividend_sink = stack.enter_context(CsvSink(
+            join(output_dir, global_csv_name), global_stock_dividend_header, append=append))
+        self.columnar_sinks: Tuple[ColumnarSink, ColumnarSink] | None = None
+        if args.columnar_output is not None:
+            os.makedirs(args.columnar_output, exist_ok=True)
+            self.columnar_sinks = (
+                stack.enter_context(ColumnarSink(args.columnar_output, os.path.splitext(japanese_csv_name)[0],
+                                                 JapaneseStockDividendRecord, args.columnar_format, append=append)),
+                stack.enter_context(ColumnarSink(args.columnar_output, os.path.splitext(global_csv_name)[0],
+                                                 GlobalStockDividendRecord, args.columnar_format, append=append)))
+        self.sqlite_sink: SqliteSink | None = None
+        if args.sqlite is not None:
+            self.sqlite_sink = stack.enter_context(SqliteSink(args.sqlite))
+
+    def write(self, result: FileResult, retained: bool = False) -> None:
+        """1ファイル分の解析結果を出力する。retainedがTrueの場合は前回の解析結果（マニフェスト）から作成した結果。"""
+        if self.cache_index is not None:
+            self.cache_index.record(result.cache_events)
+        if self.profile_report is not None and result.profile is not None:
+            self.profile_report.record(result.profile)
+        if result.failure is not None:
+            # 解析に失敗したファイルは出力せず、次回の実行時に再解析するためマニフェストにも記録しない
+            if result.failure.stage == "uncached":
+                self.uncached_files.append(result.file_path)
+            if self.failure_report is not None:
+                self.failure_report.record(result.failure)
+            return
+        sha256: str | None = None
+        if self.sqlite_sink is not None:
+            # 前回の解析結果はマニフェストの、解析したファイルはワーカーで求めたSHA-256を利用する
+            sha256 = result.sha256 if result.sha256 is not None else file_sha256(result.file_path)
+        if self.manifest is not None and not retained:
+            self.manifest.update(result)
+        if self.text_pack is not None and result.extracted_text is not None:
+            self.text_pack.put(result.file_path, result.extracted_text, truncated=result.extracted_text_truncated)
+        start = time.perf_counter()
+        with profile_stage(self.profiler, "csv"):
+            self.japanese_stock_dividend_sink.write_rows(result.japanese_stock_dividend_rows)
+            self.global_stock_dividend_sink.write_rows(result.global_stock_dividend_rows)
+            # 列指向のファイル・SQLiteへは、ワーカーで型変換したレコードを出力する
+            japanese_stock_dividend_records = result.japanese_stock_dividend_records or []
+            global_stock_dividend_records = result.global_stock_dividend_records or []
+            if self.columnar_sinks is not None:
+                self.columnar_sinks[0].write_records(japanese_stock_dividend_records)
+                self.columnar_sinks[1].write_records(global_stock_dividend_records)
+            if self.sqlite_sink is not None and sha256 is not None:
+                self.sqlite_sink.write_records(result.file_path, japanese_stock_dividend_records,
+                                               global_stock_dividend_records, sha256)
+        if self.metrics_recorder is not None and result.metrics is not None:
+            csv_seconds = time.perf_counter() - start
+            result.metrics.add("csv", csv_seconds)
+            result.metrics.total_seconds += csv_seconds
+            self.metrics_recorder.record(result)
+
+
+# --watchの監視間隔（秒）、書き込み完了とみなすまでの時間（秒）、末尾（%%EOF）がなくても解析するまでの時間（秒）
+watch_poll_seconds: Final[float] = 2.0
+watch_settle_seconds: Final[float] = 1.0
+watch_incomplete_seconds: Final[float] = 60.0
+
+
+class InotifyWatcher:
+    """inotifyでディレクトリ（複数可）配下のファイルの書き込み完了・移動を監視する（Linuxのみ）。
+
+    サブディレクトリも監視し、追加されたディレクトリは監視対象に追加する。
+    """
+    IN_CLOSE_WRITE: Final[int] = 0x00000008
+    IN_MOVED_TO: Final[int] = 0x00000080
+    IN_CREATE: Final[int] = 0x00000100
+    IN_Q_OVERFLOW: Final[int] = 0x00004000
+    IN_IGNORED: Final[int] = 0x00008000
+    IN_ISDIR: Final[int] = 0x40000000
+    event_header: Final[struct.Struct] = struct.Struct("iIII")
+
+    def __init__(self, directories: List[str]) -> None:
+        self.directories = directories
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.inotify_add_watch = libc.inotify_add_watch
+        self.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd: int = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watches: Dict[int, str] = {}
+        for directory in directories:
+            self.add_watches(directory)
+
+    def add_watches(self, directory: str) -> Set[str]:
+        """ディレクトリ配下のディレクトリを監視対象に追加し、配下のファイルを返却する。"""
+        file_paths: Set[str] = set()
+        for root, _, files in os.walk(directory):
+            wd = self.inotify_add_watch(self.fd, os.fsencode(root), self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno), root)
+            self.watches[wd] = root
+            file_paths.update(join(root, file_name) for file_name in files)
+        return file_paths
+
+    def wait(self, timeout: float) -> Set[str]:
+        """最大timeout秒待機し、書き込み・追加されたファイルのパスを返却する。"""
+        changed: Set[str] = set()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return changed
+
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.event_header.unpack_from(data, offset)
+            offset += self.event_header.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                # イベントを取りこぼした場合は、すべてのファイルを変更されたものとみなす
+                for directory in self.directories:
+                    for root, _, files in os.walk(directory):
+                        changed.update(join(root, file_name) for file_name in files)
+                continue
+            if mask & self.IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            watch_dir = self.watches.get(wd)
+            if watch_dir is None or not name:
+                continue
+
+            file_path = join(watch_dir, name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    changed.update(self.add_watches(file_path))
+            else:
+                changed.add(file_path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """一定間隔でディレクトリ（複数可）配下のファイルのサイズ・更新日時を比較して監視する（inotifyが利用できない場合）。"""
+
+    def __init__(self, directories: List[str]) -> None:
+        self.directories = directories
+        self.snapshot = self.scan()
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot: Dict[str, Tuple[int, int]] = {}
+        for directory in self.directories:
+            for root, _, files in os.walk(directory):
+                for file_name in files:
+                    file_path = join(root, file_name)
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[file_path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        """timeout秒待機し、前回から追加・変更されたファイルのパスを返却する。"""
+        time.sleep(timeout)
+        snapshot = self.scan()
+        changed = {file_path for file_path, stat in snapshot.items() if self.snapshot.get(file_path) != stat}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def create_watcher(directories: List[str]) -> InotifyWatcher | PollingWatcher:
+    try:
+        return InotifyWatcher(directories)
+    except (OSError, AttributeError) as e:
+        logger.warning(f"inotifyを利用できないため、ポーリングで監視します: {repr(e)}")
+        return PollingWatcher(directories)
+
+
+def is_pdf_complete(file_path: str) -> bool:
+    """PDFファイルが末尾まで書き込まれているかどうか。先頭が%PDF-で、末尾付近に%%EOFがある場合は書き込み済みとみなす。"""
+    try:
+        with open(file_path, mode="rb") as f:
+            if f.read(5) != b"%PDF-":
+                return False
+            f.seek(max(os.fstat(f.fileno()).st_size - 1024, 0))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+
+def watch_input(args: Arguments, known_files: Set[str], cache: ExtractCache | None = None,
+                extractor: TextExtractor | None = None, manifest: Manifest | None = None,
+                cache_index: ExtractCacheIndex | None = None, metrics_recorder: MetricsRecorder | None = None,
+                text_pack: TextPack | None = None, profile_report: ProfileReport | None = None) -> None:
+    """解析対象のディレクトリ（args.input_dirs）を監視し、追加されたPDFファイルを解析して出力に追記する（--watch）。
+
+    書き込み中のファイルを解析しないよう、サイズと更新日時がwatch_settle_seconds秒変化せず、
+    末尾（%%EOF）まで書き込まれたファイルを解析する。
+    pdfminerをインポート済みのこのプロセスで逐次解析するため、ファイルごとの起動・インポートの時間はかからない。
+    解析済みのファイルが変更された場合は、CSVの行を置き換えられないため警告のみ出力する。
+    解析エラーのファイルは出力せず、手修正用テキストファイル（.pdf.txt）が作成・変更された場合に再解析する。
+    --timeoutを指定した場合は、制限時間を超えたファイルを解析エラーとする（メインスレッドで実行するためSIGALRMで通知できる）。
+    Ctrl+C（SIGINT）またはSIGTERMで終了する。
+
+    Args:
+        known_files: 解析済みのPDFファイルパス。解析したファイルを追加する。
+    """
+    def interrupt(signum: int, frame: Any) -> None:
+        raise KeyboardInterrupt()
+
+    signal.signal(signal.SIGTERM, interrupt)
+    input_dirs = [input_root for input_root in args.input_dirs if os.path.isdir(input_root)]
+    watcher = create_watcher(input_dirs)
+    # ファイルパス→(サイズ, 更新日時, サイズ・更新日時が変化しなくなった時刻)
+    pending: Dict[str, Tuple[int, int, float]] = {}
+    # 解析エラーのファイルパス→解析エラー時の.pdf.txtの更新日時
+    failed: Dict[str, int | None] = {}
+
+    # 初回の解析中に追加されたファイル
+    for file_path in find_pdf_files(args):
+        if file_path not in known_files:
+            pending[file_path] = (-1, -1, 0.0)
+
+    logger.info(f"監視開始: {', '.join(input_dirs)}（{type(watcher).__name__}）")
+    try:
+        while True:
+            for file_path in watcher.wait(watch_settle_seconds if pending else watch_poll_seconds):
+                if file_path.upper().endswith(".PDF.TXT"):
+                    file_path = file_path[:-len(".txt")]
+                    if file_path not in failed or failed[file_path] == mtime_or_none(file_path + ".txt"):
+                        continue
+                elif not is_target_file(file_path, args):
+                    continue
+                elif file_path in known_files:
+                    if exists(file_path):
+                        logger.warning(f"解析済みのファイルが変更されました。出力に反映するには再実行してください: {file_path}")
+                    continue
+                pending.setdefault(file_path, (-1, -1, 0.0))
+
+            now = time.monotonic()
+            ready_files: List[str] = []
+            for file_path, (size, mtime, stable_since) in list(pending.items()):
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    del pending[file_path]
+                    continue
+                if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                    pending[file_path] = (stat.st_size, stat.st_mtime_ns, now)
+                elif now - stable_since >= watch_settle_seconds and is_pdf_complete(file_path):
+                    ready_files.append(file_path)
+                elif now - stable_since >= watch_incomplete_seconds:
+                    logger.warning(f"PDFの末尾が見つかりませんが、{watch_incomplete_seconds}秒変更がないため解析します: {file_path}")
+                    ready_files.append(file_path)
+            if not ready_files:
+                continue
+
+            with ExitStack() as stack:
+                writer = ResultWriter(stack, args, manifest, cache_index, metrics_recorder, text_pack=text_pack, append=True,
+                                      profile_report=profile_report)
+                for file_path in sorted(ready_files):
+                    del pending[file_path]
+                    try:
+                        result = process_file_with_limits(file_path, args, cache, extractor, text_pack=text_pack)
+                    except Exception as e:
+                        logger.error(f"解析エラーのため出力しません。.pdf.txtを手修正すると再解析します: {file_path}, {repr(e)}")
+                        failed[file_path] = mtime_or_none(file_path + ".txt")
+                        continue
+                    if result.failure is not None:
+                        # --keep-goingを指定した場合は、解析エラーが送出されずにFileResult.failureとして返却される
+                        logger.error(f"解析エラーのため出力しません。.pdf.txtを手修正すると再解析します: {file_path}, "
+                                     f"{result.failure.exception}: {result.failure.message}")
+                        failed[file_path] = mtime_or_none(file_path + ".txt")
+                        continue
+                    failed.pop(file_path, None)
+                    known_files.add(file_path)
+                    writer.write(result)
+            if manifest is not None:
+                manifest.save()
+            if cache_index is not None:
+                cache_index.save()
+            if text_pack is not None:
+                text_pack.save()
+    except KeyboardInterrupt:
+        logger.info("監視終了")
+    finally:
+        watcher.close()
+
+
+def find_shard_csv_files(shard_dirs: List[str], csv_name: str) -> List[str]:
+    """シャードごとのCSV（<CSV名>.shard-<i>-of-<N>.csv）をシャード番号順に返却する。
+
+    シャード数が異なるCSVが含まれる場合、同じシャード番号のCSVが複数ある場合、不足しているシャードがある場合はValueErrorを送出する。
+    """
+    stem, ext = os.path.splitext(csv_name)
+    pattern = re.compile(re.escape(stem) + r"\.shard-(\d+)-of-(\d+)" + re.escape(ext))
+    shard_paths: Dict[int, str] = {}
+    shard_counts: Set[int] = set()
+    for shard_dir in shard_dirs:
+        for file_name in sorted(os.listdir(shard_dir)):
+            m = pattern.fullmatch(file_name)
+            if m is None:
+                continue
+            index = int(m.group(1))
+            file_path = join(shard_dir, file_name)
+            if index in shard_paths:
+                raise ValueError(f"同じシャードのCSVが複数あります: {shard_paths[index]}, {file_path}")
+            shard_paths[index] = file_path
+            shard_counts.add(int(m.group(2)))
+
+    if not shard_paths:
+        raise ValueError(f"シャードごとのCSVがありません: {stem}.shard-*-of-*{ext}")
+    if len(shard_counts) != 1:
+        raise ValueError(f"シャード数が異なるCSVが含まれています: {', '.join(sorted(shard_paths.values()))}")
+    missing = sorted(set(range(1, shard_counts.pop() + 1)) - set(shard_paths))
+    if missing:
+        raise ValueError(f"シャード{', '.join(map(str, missing))}の{csv_name}がありません")
+    return [shard_paths[index] for index in sorted(shard_paths)]
+
+
+def read_shard_csv(csv_path: str, header: List[str],
+                   input_roots: List[List[str]]) -> Generator[Tuple[Tuple[int, str], List[str]], None, None]:
+    """シャードごとのCSVの行を、行の順序のキー（input_sort_key()）とあわせて返却する。
+
+    ヘッダが異なる場合、入力ディレクトリに含まれないファイルの行がある場合、行がキーの順序ではない場合はValueErrorを送出する。
+    """
+    with open(csv_path, mode="r", encoding="cp932", newline="") as f:
+        reader = csv.reader(f)
+        if next(reader, None) != header:
+            raise ValueError(f"CSVのヘッダが一致しません: {csv_path}")
+        last_key = (-1, "")
+        for row in reader:
+            key = input_sort_key(row[0], input_roots)
+            if key is None:
+                raise ValueError(f"入力ディレクトリに含まれないファイルの行があります（シャードを実行した入力ディレクトリを"
+                                 f"--input-dirで指定してください）: {csv_path}, {row[0]}")
+            if key < last_key:
+                raise ValueError(f"CSVの行がファイルパス順ではありません（--watchで追記した場合は再実行してください）: {csv_path}, {row[0]}")
+            last_key = key
+            yield key, row
+
+
+def merge_shard_outputs(args: Arguments) -> int:
+    """--shardで分割して出力したCSVを結合して、通常のCSV（./output/*.csv）を出力する（mergeサブコマンド）。
+
+    シャードごとのCSVはfind_pdf_files()と同じ(入力ディレクトリの順序, 入力ディレクトリからの相対パス)の順序のため、
+    全行をメモリに読み込まずに同じ順序で結合する。args.input_dirsにはシャードを実行した入力ディレクトリを同じ順序で指定し、
+    マシンごとにパスが異なる場合は、同じ入力ディレクトリのパスをos.pathsep（:）で区切って指定する。
+    ファイルが同じ行は1つのシャード内の順序のまま出力するため、分割せずに実行した場合と同じCSVになる。
+    同じファイル（キーが同じ）の行が複数のシャードにある場合は重複として、シャード番号が最も小さいCSVの行のみ出力する。
+
+    Returns:
+        int: 終了コード。CSVが不足している場合などは1。
+    """
+    logger.info("結合開始")
+    input_roots = [input_dir.split(os.pathsep) for input_dir in args.input_dirs]
+    try:
+        for csv_name, header in ((japanese_stock_dividend_csv_name, japanese_stock_dividend_header),
+                                 (global_stock_dividend_csv_name, global_stock_dividend_header)):
+            shard_paths = find_shard_csv_files(args.shard_dirs, csv_name)
+            shard_rows = [zip(repeat(index), read_shard_csv(csv_path, header, input_roots))
+                          for index, csv_path in enumerate(shard_paths)]
+
+            duplicates: Dict[str, List[str]] = {}
+            current_key: Tuple[int, str] | None = None
+            current_index = -1
+            with CsvSink(join(output_dir, csv_name), header) as sink:
+                # 1ファイル分の行をまとめて出力する
+                rows: List[List[str]] = []
+                # heapq.mergeはキーが同じ場合は引数の順序（シャード番号順）で返却する
+                for index, (key, row) in heapq.merge(*shard_rows, key=lambda item: item[1][0]):
+                    if key != current_key:
+                        sink.write_rows(rows)
+                        rows = []
+                        current_key = key
+                        current_index = index
+                    elif index != current_index:
+                        duplicates.setdefault(row[0], [shard_paths[current_index]])
+                        if shard_paths[index] not in duplicates[row[0]]:
+                            duplicates[row[0]].append(shard_paths[index])
+                        continue
+                    rows.append(row)
+                sink.write_rows(rows)
+
+            logger.info(f"{csv_name}: シャード数={len(shard_paths)}, 重複ファイル数={len(duplicates)}")
+            for file_path, csv_paths in duplicates.items():
+                logger.warning(f"複数のシャードに同じファイルの行があります（{csv_paths[0]}の行のみ出力）: {file_path}, {', '.join(csv_paths)}")
+    except (ValueError, OSError) as e:
+        logger.error(f"結合エラー: {e}")
+        return 1
+
+    logger.info("結合終了")
+    return 0
+
+
+def export_text(args: Arguments) -> int:
+    """テキストパックのテキストを.pdf.txtに出力する（export-textサブコマンド）。
+
+    解析対象のファイル（-i、--includeなどで絞り込み）のうち、テキストパックにテキストがあるファイルを出力する。
+    手修正した.pdf.txtはテキストパックより優先して読み込まれ、import-textでテキストパックに取り込める。
+    既存の.pdf.txtは上書きしない。
+    """
+    text_pack = TextPack(cast(str, args.text_pack))
+    exported = 0
+    try:
+        for file_path in find_pdf_files(args):
+            if text_pack.key(file_path) not in text_pack.entries:
+                continue
+            txt_file_path = file_path + ".txt"
+            if exists(txt_file_path):
+                logger.warning(f".pdf.txtが存在するため出力しません: {txt_file_path}")
+                continue
+            packed = text_pack.get(file_path)
+            if packed is None:
+                logger.warning(f"PDFファイルが変更されているため出力しません: {file_path}")
+                continue
+            text, truncated = packed
+            if truncated:
+                logger.debug(f"「以下余白」以降のページを含まないテキストを出力: {txt_file_path}")
+            with open(txt_file_path, mode="w", encoding="utf-8") as f:
+                f.write(text)
+            exported += 1
+            logger.debug(f"出力: {txt_file_path}")
+    finally:
+        text_pack.close()
+    logger.info(f"テキストパックから出力: {exported}件")
+    return 0
+
+
+def import_text(args: Arguments) -> int:
+    """.pdf.txtをテキストパックに手修正のテキストとして取り込む（import-textサブコマンド）。
+
+    取り込んだテキストはPDFファイルが変更されても利用する（.pdf.txtと同じ扱い）。
+    取り込み後は.pdf.txtを削除する（--keep-textを指定した場合は削除しない）。
+    """
+    text_pack = TextPack(cast(str, args.text_pack))
+    imported: List[str] = []
+    try:
+        for file_path in find_pdf_files(args):
+            txt_file_path = file_path + ".txt"
+            if not exists(txt_file_path):
+                continue
+            with open(txt_file_path, mode="r", encoding="utf-8") as f:
+                text_pack.put(file_path, f.read(), edited=True)
+            imported.append(txt_file_path)
+            logger.debug(f"取り込み: {txt_file_path}")
+        text_pack.save()
+    finally:
+        text_pack.close()
+
+    if not args.keep_text:
+        for txt_file_path in imported:
+            os.remove(txt_file_path)
+    logger.info(f"テキストパックへ取り込み: {len(imported)}件")
+    return 0
+
+
+def create_extractor(args: Arguments) -> TextExtractor:
+    """引数（--extract-mode、--roi-config）からテキストの抽出方法を作成する。"""
+    roi_regions: RoiRegions | None = None
+    roi_digest = ""
+    if args.roi_config is not None:
+        roi_regions, roi_digest = load_roi_config(args.roi_config)
+        logger.info(f"ROI設定ファイル読み込み: {args.roi_config}, 対象: {', '.join(t.name for t in roi_regions)}")
+    return TextExtractor.create(args.extract_mode, roi_regions, roi_digest)
+
+
+def create_extract_cache(args: Arguments, extractor: TextExtractor) -> Tuple[ExtractCache | None, ExtractCacheIndex | None]:
+    """抽出キャッシュとインデックスを作成する。--no-cacheを指定した場合はNone。"""
+    if args.cache_dir is None:
+        return (None, None)
+    os.makedirs(args.cache_dir, exist_ok=True)
+    return (ExtractCache(args.cache_dir, extractor), ExtractCacheIndex(args.cache_dir, args.cache_size))
+
+
+def file_result_to_dict(result: FileResult) -> Dict[str, Any]:
+    """解析結果をJSONで返却する形式に変換する。各行はCSVのヘッダーをキーとした辞書。"""
+    return {
+        "file_path": result.file_path,
+        "pdf_type": result.pdf_type.name if result.pdf_type is not None else None,
+        "japanese_stock_dividend": [dict(zip(japanese_stock_dividend_header, row))
+                                    for row in result.japanese_stock_dividend_rows],
+        "global_stock_dividend": [dict(zip(global_stock_dividend_header, row)) for row in result.global_stock_dividend_rows],
+        "failure": result.failure.to_dict() if result.failure is not None else None,
+        "seconds": result.metrics.total_seconds if result.metrics is not None else None,
+    }
+
+
+class ParseServer:
+    """解析サーバー（serveサブコマンド）の解析処理。
+
+    pdfminerをインポート済みのプロセスから起動したプロセスプールを保持し、リクエストごとにワーカーで解析する。
+    解析エラーは送出せずに、--keep-goingと同様にFileResult.failureとして返却する。
+    ワーカープロセスが異常終了した場合は、プロセスプールを作り直して解析エラー（crash）とする。
+    """
+
+    def __init__(self, args: Arguments, cache: ExtractCache | None = None, extractor: TextExtractor | None = None,
+                 cache_index: ExtractCacheIndex | None = None) -> None:
+        self.args = replace(args, keep_going=True)
+        self.cache = cache
+        self.extractor = extractor
+        self.cache_index = cache_index
+        self.text_pack = TextPack(args.text_pack) if args.text_pack is not None else None
+        self.lock = threading.Lock()
+        self.executor = self.create_executor()
+
+    def create_executor(self) -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(max_workers=self.args.jobs, initializer=setup_logging)
+        # 最初のリクエストでワーカープロセスの起動を待たないよう、起動しておく
+        for future in [executor.submit(os.getpid) for _ in range(self.args.jobs)]:
+            future.result()
+        return executor
+
+    def parse(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """リクエストのPDFを解析する。
+
+        リクエストは{"path": PDFファイルパス}、または{"name": ファイル名, "data": Base64エンコードしたPDFの内容}。
+        PDFの内容を受け取った場合は、.pdf.txtの読み込み・保存を行わない。
+        """
+        sidecar = "data" not in request
+        if sidecar:
+            file_path = request["path"]
+            data: bytes | None = None
+        else:
+            file_path = request.get("name", "")
+            data = base64.b64decode(request["data"], validate=True)
+        if not isinstance(file_path, str):
+            raise ValueError("ファイルパスは文字列で指定してください")
+
+        if self.text_pack is not None:
+            # 他のプロセスで追記された場合は開き直す
+            with self.lock:
+                self.text_pack.refresh()
+
+        executor = self.executor
+        try:
+            result = executor.submit(process_file_with_limits, file_path, self.args, self.cache, self.extractor, data,
+                                     sidecar, self.text_pack).result()
+        except BrokenProcessPool as e:
+            with self.lock:
+                if self.executor is executor:
+                    logger.warning("ワーカープロセスが異常終了したため、プロセスプールを再作成します")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = self.create_executor()
+            failure = FileFailure.from_exception(file_path, e)
+            logger.error(f"解析エラー: {file_path}, {failure.stage}, {repr(e)}")
+            result = FileResult(file_path, None, [], [], [], failure=failure)
+
+        if self.cache_index is not None:
+            with self.lock:
+                self.cache_index.record(result.cache_events)
+        return file_result_to_dict(result)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.text_pack is not None:
+            self.text_pack.close()
+        if self.cache_index is not None:
+            self.cache_index.save()
+            logger.info(f"抽出キャッシュ: {self.cache_index.summary()}")
+
+
+class ParseRequestHandler(socketserver.StreamRequestHandler):
+    """1接続分のリクエストを処理する。
+
+    リクエスト・レスポンスはJSON Lines形式（1行1件）。1つの接続で複数のリクエストを順に送信できる。
+    """
+
+    def handle(self) -> None:
+        parse_server = cast(ParseSocketServer, self.server).parse_server
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("リクエストはJSONオブジェクトで指定してください")
+                response = parse_server.parse(request)
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"error": f"不正なリクエスト: {repr(e)}"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class ParseSocketServer(socketserver.ThreadingUnixStreamServer):
+    """解析サーバーのUnixソケット。接続ごとにスレッドで処理する。"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, parse_server: ParseServer) -> None:
+        self.parse_server = parse_server
+        # ソケットは実行ユーザーのみ接続できるようにする（任意のファイルパスを読み込めるため）
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, ParseRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+
+def is_server_running(socket_path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+    return True
+
+
+def serve(args: Arguments) -> int:
+    """解析サーバーを起動する（serveサブコマンド）。
+
+    Unixソケット（args.socket）で解析するPDFを受け付け、解析結果をJSONで返却する。
+    起動・インポート・プロセスプールの作成は起動時に1回だけ行うため、リクエストごとの処理時間は解析時間のみとなる。
+    Ctrl+C（SIGINT）またはSIGTERMで終了する。
+    """
+    def interrupt(signum: int, frame: Any) -> None:
+        raise KeyboardInterrupt()
+
+    if exists(args.socket):
+        if is_server_running(args.socket):
+            logger.error(f"サーバーは起動済みです: {args.socket}")
+            return 1
+        # 前回のサーバーが残したソケットファイルを削除
+        os.remove(args.socket)
+
+    extractor = create_extractor(args)
+    cache, cache_index = create_extract_cache(args, extractor)
+    parse_server = ParseServer(args, cache, extractor, cache_index)
+    try:
+        with ParseSocketServer(args.socket, parse_server) as server:
+            signal.signal(signal.SIGTERM, interrupt)
+            logger.info(f"サーバー起動: {args.socket}, プロセス数={args.jobs}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                logger.info("サーバー終了")
+            finally:
+                os.remove(args.socket)
+    finally:
+        # 終了処理（抽出キャッシュのインデックスの保存）中に再度中断されないようにする
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        parse_server.close()
+    return 0
+
+
+def main(args: Arguments) -> int:
+    """メイン処理。終了コード（--keep-goingで解析エラーのファイルがあった場合は1、それ以外は0）を返却する。"""
+    if args.command == "merge":
+        return merge_shard_outputs(args)
+    if args.command == "serve":
+        return serve(args)
+    if args.command == "export-text":
+        return export_text(args)
+    if args.command == "import-text":
+        return import_text(args)
+
+    logger.info("処理開始")
+
+    listing: DirectoryListingCache | None = None
+    if args.cache_dir is not None:
+        os.makedirs(args.cache_dir, exist_ok=True)
+        listing = DirectoryListingCache(args.cache_dir)
+    pdf_files = find_pdf_files(args, listing)
+    if listing is not None:
+        listing.save()
+        logger.debug(f"ディレクトリの一覧: キャッシュヒット={listing.hits}, 読み込み={listing.misses}")
+
+    if args.dump_layout:
+        for file_path in pdf_files:
+            dump_layout(file_path)
+        return 0
+
+    extractor = create_extractor(args)
+    cache, cache_index = create_extract_cache(args, extractor)
+
+    manifest: Manifest | None = None
+    retained: Dict[str, FileResult] = {}
+    if args.incremental:
+        manifest = Manifest(join(output_dir, shard_file_name(manifest_file_name, args.shard)))
+        for file_path in pdf_files:
+            result = manifest.lookup(file_path)
+            if result is not None and needs_records(args):
+                try:
+                    result.convert_rows()
+                except ValueError as e:
+                    logger.warning(f"前回の解析結果を型変換できないため再解析します: {file_path}, {repr(e)}")
+                    result = None
+            if result is not None:
+                retained[file_path] = result
+        logger.info(f"差分解析: 解析対象={len(pdf_files) - len(retained)}, 前回の解析結果を利用={len(retained)}")
+
+    metrics_recorder: MetricsRecorder | None = None
+    if args.metrics is not None:
+        metrics_recorder = MetricsRecorder(args.metrics)
+
+    profile_report: ProfileReport | None = None
+    if args.profile is not None:
+        profile_report = ProfileReport(args.profile)
+
+    failure_report: FailureReport | None = None
+    if args.keep_going:
+        failure_report = FailureReport(join(output_dir, shard_file_name(failure_report_name, args.shard)))
+
+    text_pack: TextPack | None = None
+    if args.text_pack is not None:
+        text_pack = TextPack(args.text_pack)
+
+    try:
+        # 1ファイルの解析が終わるごとにCSV（と列指向のファイル、SQLite）へ出力する
+        with ExitStack() as stack:
+            writer = ResultWriter(stack, args, manifest, cache_index, metrics_recorder, failure_report, text_pack,
+                                  profile_report=profile_report)
+            asyncio.run(run_pipeline(pdf_files, retained, args, writer, cache, extractor, text_pack))
+        if writer.uncached_files:
+            logger.warning(f"抽出済みのテキストがないためスキップしたファイル: {len(writer.uncached_files)}件"
+                           "（--only-cachedを指定せずに実行すると抽出して解析します）")
+
+        if args.watch:
+            watch_input(args, set(pdf_files), cache, extractor, manifest, cache_index, metrics_recorder, text_pack,
+                        profile_report)
+    finally:
+        # 解析エラーで終了する場合も、それまでの計測結果を残す
+        if metrics_recorder is not None:
+            metrics_recorder.close()
+        if profile_report is not None:
+            profile_report.close()
+        if failure_report is not None:
+            failure_report.close()
+        # 解析エラーで終了する場合も、それまでに解析した結果をマニフェストに残す
+        if manifest is not None:
+            manifest.save()
+        # 解析エラーで終了する場合も、それまでに抽出したテキストをキャッシュに残す
+        if cache_index is not None:
+            cache_index.save()
+            logger.info(f"抽出キャッシュ: {cache_index.summary()}")
+        if text_pack is not None:
+            text_pack.save()
+            text_pack.close()
+
+    logger.info("処理終了")
+    return 1 if failure_report is not None and failure_report.failures else 0
+
+
+def setup_logging() -> None:
+    """ロガーを設定する。
+
+    プロセスプールのワーカーでも同じ形式でログを出力するため、ワーカーの初期化処理としても利用する。
+    """
+    if logger.handlers:
+        return
+
+    formatter = '%(asctime)s [%(levelname)s]: %(message)s'
+
+    stdout_handler = logging.StreamHandler(sys.stdout)
+    stdout_handler.setFormatter(logging.Formatter(formatter))
+
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(stdout_handler)
+    # logging.basicConfig(level=logger.DEBUG, format=formatter)
+
+
+if __name__ == "__main__":
+    setup_logging()
 
     args = parse_arguments()
-    main(args)
+    sys.exit(main(args))
@@ -0,0 +1,83 @@
+"""mergeサブコマンドのテスト。"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+
+from os.path import join, dirname, abspath
+
+ROOT_DIR = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmark import japanese_edited_text  # noqa: E402
+
+SCRIPT = join(ROOT_DIR, "sbi-pdf2text.py")
+
+
+class TestMergeMultipleInputDirs(unittest.TestCase):
+    """複数の入力ディレクトリを指定して分割実行したCSVの結合。"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.work_dir = self.temp_dir.name
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def put_pdf(self, relative_path: str, records: int) -> None:
+        """解析済みテキスト（.pdf.txt）を付けたダミーのPDFファイルを作成する。"""
+        pdf_path = join(self.work_dir, relative_path)
+        os.makedirs(dirname(pdf_path), exist_ok=True)
+        with open(pdf_path, mode="wb") as f:
+            f.write(b"%PDF-1.4\n")
+        with open(pdf_path + ".txt", mode="w", encoding="utf-8") as f:
+            f.write(japanese_edited_text(records))
+
+    def run_cli(self, *cli_args: str) -> subprocess.CompletedProcess:
+        os.makedirs(join(self.work_dir, "output"), exist_ok=True)
+        return subprocess.run([sys.executable, SCRIPT, "--no-cache", "--input-dir", "./x", "--input-dir", "./y", *cli_args],
+                              cwd=self.work_dir, capture_output=True, text=True)
+
+    def read_csv(self, *path: str) -> str:
+        with open(join(self.work_dir, *path), mode="r", encoding="cp932") as f:
+            return f.read()
+
+    def assert_merged_equals_unsharded(self) -> str:
+        """分割せずに実行したCSVと、--shard 1/1で実行して結合したCSVが同じことを確認する。"""
+        result = self.run_cli()
+        self.assertEqual(result.returncode, 0, result.stderr)
+        os.rename(join(self.work_dir, "output"), join(self.work_dir, "unsharded"))
+        result = self.run_cli("--shard", "1/1")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        os.rename(join(self.work_dir, "output"), join(self.work_dir, "shard"))
+        result = self.run_cli("merge", "./shard")
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        expected = self.read_csv("unsharded", "japanese_stock_dividend.csv")
+        self.assertEqual(self.read_csv("output", "japanese_stock_dividend.csv"), expected)
+        self.assertEqual([name for name in os.listdir(join(self.work_dir, "output")) if name.endswith(".partial")], [])
+        return expected
+
+    def test_input_dir_order(self) -> None:
+        """後に指定した入力ディレクトリのファイルの相対パスが小さい場合も、入力ディレクトリの順序で結合する。"""
+        self.put_pdf("x/b.pdf", 1)
+        self.put_pdf("y/a.pdf", 2)
+
+        merged = self.assert_merged_equals_unsharded()
+        lines = merged.splitlines()[1:]
+        self.assertEqual([line.split(",")[0] for line in lines], ["./x/b.pdf", "./y/a.pdf", "./y/a.pdf"])
+
+    def test_same_relative_path(self) -> None:
+        """入力ディレクトリが異なる同じ相対パスのファイルは重複としない。"""
+        self.put_pdf("x/a.pdf", 1)
+        self.put_pdf("y/a.pdf", 1)
+
+        merged = self.assert_merged_equals_unsharded()
+        lines = merged.splitlines()[1:]
+        self.assertEqual([line.split(",")[0] for line in lines], ["./x/a.pdf", "./y/a.pdf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""外国株式（parse_global_stock_dividend_report）の解析のテスト。
+
+期待値は、行リストを変更せずに参照する実装に書き換える前の実装（baseline）で合成データを解析した結果。
+"""
+
+import sys
+import unittest
+
+from os.path import dirname, abspath
+from typing import List
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from benchmark import sbi, global_report_text  # noqa: E402
+
+
+def expected_ver1(no: int) -> List[str]:
+    """global_ver1_record_lines(no)を従来の実装で解析した結果"""
+    return ["2019/08/07", "2019/08/08", "2019/08/02", f"304-V{no:05d}", f"合成ETF {no}", "※未取得※", "10.0", "0.367189",
+            "※未取得※", f"{10 + no}", "10.28", "1.02", "0.00", "9.26", "1.85", "7.41", "2019/08/07", "105.1700",
+            "2019/08/08", "106.1100", "1081", "107", "974", "1.40", "0.45", "149", "48", "1.85"]
+
+
+def expected_ver2(no: int) -> List[str]:
+    """global_ver2_record_lines(no)を従来の実装で解析した結果"""
+    return ["2023/03/29", "2023/03/30", "2023/03/24", f"304-W{no:05d}", f"ETF {no}", "※未取得※", "10.0", "1.042139",
+            "※未取得※", f"{100 + no}", "119.85", "11.98", "0.00", "107.87", "21.52", "86.35", "2023/03/29", "130.2800",
+            "2023/03/30", "132.5500", "15614", "1560", "14054", "16.23", "5.29", "2152", "702", "21.52"]
+
+
+def insert_lines(text: str, positions: List[int], block: List[str]) -> str:
+    """テキストの指定した行番号（挿入前）の位置にそれぞれblockの行を挿入する。"""
+    lines = text.split("\n")
+    for position in sorted(positions, reverse=True):
+        lines[position:position] = block
+    return "\n".join(lines)
+
+
+def parse(text: str) -> List[List[str]]:
+    return list(sbi.parse_global_stock_dividend_report(text, sbi.judge_pdf_type(text)))
+
+
+class TestParseGlobalStockDividendReport(unittest.TestCase):
+
+    def test_ver1(self) -> None:
+        self.assertEqual(parse(global_report_text(3, ver1=True)), [expected_ver1(no) for no in range(3)])
+
+    def test_ver2(self) -> None:
+        self.assertEqual(parse(global_report_text(3, ver1=False)), [expected_ver2(no) for no in range(3)])
+
+    def test_ver2_gt(self) -> None:
+        """VER2の「gT」の行と直後の空行は除外する。"""
+        expected = [expected_ver2(no) for no in range(3)]
+        text = global_report_text(3, ver1=False)
+        cases = [
+            [10],           # 1銘柄目の途中
+            [10, 20, 30],   # 1銘柄に複数
+            [10, 70, 130],  # 各銘柄
+            [50, 52, 54],   # 1銘柄目の末尾（次の銘柄の検索開始位置より後ろ）
+            [57],           # 1銘柄目の56行目以降
+        ]
+        for positions in cases:
+            with self.subTest(positions=positions):
+                self.assertEqual(parse(insert_lines(text, positions, ["gT", ""])), expected)
+
+    def test_ver2_gt_without_blank_line(self) -> None:
+        """直後が空行ではない「gT」の行は、「gT」の行のみ除外する。"""
+        text = insert_lines(global_report_text(2, ver1=False), [10, 12], ["gT"])
+        self.assertEqual(parse(text), [expected_ver2(no) for no in range(2)])
+
+    def test_ver2_repeated_gt(self) -> None:
+        """連続する「gT」の行は、除外した行の位置に詰められた「gT」の行を除外しない（従来の実装と同じく解析エラー）。"""
+        text = global_report_text(2, ver1=False)
+        for block in (["gT", "", "gT", ""], ["gT", "gT", ""]):
+            with self.subTest(block=block):
+                with self.assertRaises(sbi.ReportParseError):
+                    parse(insert_lines(text, [10], block))
+
+    def test_ver1_gt(self) -> None:
+        """VER1は「gT」の行を除外しない（従来の実装と同じく解析エラー）。"""
+        text = insert_lines(global_report_text(2, ver1=True), [10], ["gT", ""])
+        with self.assertRaises(sbi.ReportParseError):
+            parse(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""国内株式（parse_japanese_stock_dividend_report）の解析のテスト。
+
+期待値は、索引による解析に書き換える前の実装（baseline）で合成データを解析した結果。
+"""
+
+import sys
+import unittest
+
+from os.path import dirname, abspath
+from typing import List
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from benchmark import sbi, japanese_report_text, japanese_edited_text  # noqa: E402
+
+# japanese_report_text(5)を従来の実装で解析した結果
+EXPECTED_ROWS: List[List[str]] = [
+    ["銘柄00000", "1000", "2023年12月1日", "105.0000000", "100", "10500", "1608", "525", "0", "8367"],
+    ["銘柄00001", "1001", "2023年12月1日", "105.0000000", "101", "10605", "1624", "530", "0", "8451"],
+    ["銘柄00002", "1002", "2023年12月1日", "105.0000000", "102", "10710", "1640", "535", "0", "8535"],
+    ["銘柄00003", "1003", "2023年12月1日", "105.0000000", "103", "10815", "1656", "540", "0", "8619"],
+    ["銘柄00004", "1004", "2023年12月1日", "105.0000000", "104", "10920", "1672", "546", "0", "8702"],
+]
+
+
+def drop_blank_line(text: str, numbers: List[int]) -> str:
+    """指定した銘柄の銘柄名の次の空行を削除する（銘柄名と銘柄コードの間に空行がないPDF）。"""
+    for no in numbers:
+        text = text.replace(f"銘柄{no:05d}\n\n", f"銘柄{no:05d}\n")
+    return text
+
+
+def parse(text: str) -> List[List[str]]:
+    return list(sbi.parse_japanese_stock_dividend_report(text, sbi.judge_pdf_type(text)))
+
+
+class TestParseJapaneseStockDividendReport(unittest.TestCase):
+
+    def test_multiple_pages(self) -> None:
+        """1ページ2銘柄の複数ページ。"""
+        self.assertEqual(parse(japanese_report_text(4)), EXPECTED_ROWS[:4])
+
+    def test_last_page_single_stock(self) -> None:
+        """最終ページの銘柄が1つ（銘柄2の位置に「以下余白」）。"""
+        self.assertEqual(parse(japanese_report_text(5)), EXPECTED_ROWS)
+
+    def test_pages(self) -> None:
+        """ページ単位で渡した場合も、テキスト全体を渡した場合と同じ結果となる。"""
+        text = japanese_report_text(5)
+        pages = [page + "\f" for page in text.split("\f")[:-1]]
+        pdf_type = sbi.judge_pdf_type(text)
+        rows = list(sbi.parse_japanese_stock_dividend_report(iter(pages), pdf_type, lambda: len(pages)))
+        self.assertEqual(rows, EXPECTED_ROWS)
+
+    def test_edited(self) -> None:
+        """手修正されたフォーマット。"""
+        text = japanese_edited_text(3)
+        self.assertEqual(sbi.judge_pdf_type(text), sbi.PdfType.JAPANESE_STOCK_DIVIDEND_REPORT_VER_EDITED)
+        self.assertEqual(parse(text), EXPECTED_ROWS[:3])
+
+    def test_missing_blank_line(self) -> None:
+        """銘柄名の次に空行がない銘柄（ページの銘柄1・銘柄2）。"""
+        self.assertEqual(parse(drop_blank_line(japanese_report_text(4), [1, 2])), EXPECTED_ROWS[:4])
+
+    def test_missing_blank_line_last_page_single_stock(self) -> None:
+        """最終ページの1つだけの銘柄の次に空行がない場合。
+
+        従来の実装では、空行の補完後に銘柄2の開始位置が-1から0になり解析エラーとなっていた。
+        """
+        self.assertEqual(parse(drop_blank_line(japanese_report_text(3), [2])), EXPECTED_ROWS[:3])
+
+    def test_page_count_mismatch(self) -> None:
+        """読み込んでいないページがあり、PDFのページ数と解析したページ数が一致しない場合はエラーとする。"""
+        text = japanese_report_text(3)
+        pdf_type = sbi.judge_pdf_type(text)
+        with self.assertRaises(sbi.ReportParseError):
+            list(sbi.parse_japanese_stock_dividend_report(text, pdf_type, lambda: 3))
+
+
+if __name__ == "__main__":
+    unittest.main()